@@ -3,5 +3,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "CollapseAPI.settings")
+# Serve the hot write endpoints as native async views
+os.environ.setdefault("DJANGO_ASYNC_VIEWS", "True")
 
 application = get_asgi_application()
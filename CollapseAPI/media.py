@@ -0,0 +1,176 @@
+"""
+Serving of user-uploaded media (``MEDIA_ROOT``).
+
+``MEDIA_SERVE_MODE`` picks how a file reaches the client:
+
+- ``django``: served in-process with ``FileResponse`` (``sendfile`` under
+  gunicorn), with ``ETag``/``Last-Modified`` validation, single ``Range``
+  requests and precompressed ``.br``/``.gz`` variants.
+- ``x-accel``: nginx serves the file from ``MEDIA_ACCEL_REDIRECT_PREFIX``
+  via ``X-Accel-Redirect``.
+- ``sendfile``: Apache/lighttpd serve the file via ``X-Sendfile``.
+- ``static``: ``django.views.static.serve``, kept for comparison.
+
+Content-addressed blobs never change, so they are cached as immutable.
+"""
+
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import serve as static_serve
+
+from clients.storage import content_addressed_storage
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+# Precompressed variants in order of preference, as written by compress_media
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+
+def cache_control(path):
+    if path.startswith(f"{content_addressed_storage.prefix}/"):
+        return f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+    return f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}"
+
+
+def parse_range(header, size):
+    """
+    ``(start, end)`` of a single ``bytes=`` range, inclusive, or ``None`` if
+    the header is missing or not one this server handles (the whole file is
+    sent then). Raises ``ValueError`` for a range outside of the file.
+    """
+    match = RANGE_RE.match(header or "")
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def _read(f, start, length):
+    with f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _precompressed(request, fullpath):
+    """
+    ``(encoding, path)`` of the precompressed variant to send, or ``(None,
+    fullpath)`` for the file itself. Ranges are only served from the file
+    itself, so a request with ``Range`` never gets a variant.
+    """
+    if "HTTP_RANGE" in request.META:
+        return None, fullpath
+    accepted = request.META.get("HTTP_ACCEPT_ENCODING", "")
+    for encoding, suffix in ENCODINGS:
+        if encoding in accepted and os.path.isfile(fullpath + suffix):
+            return encoding, fullpath + suffix
+    return None, fullpath
+
+
+def _etag(stat_result, encoding=None):
+    """Strong ETag of the file, or of its ``encoding`` variant"""
+    etag = f"{int(stat_result.st_mtime):x}-{stat_result.st_size:x}"
+    return f'"{etag}-{encoding}"' if encoding else f'"{etag}"'
+
+
+def _file_response(request, fullpath, sendpath, encoding, stat_result, etag):
+    if encoding:
+        response = FileResponse(
+            open(sendpath, "rb"), filename=os.path.basename(fullpath)
+        )
+        response["Content-Encoding"] = encoding
+        response["Accept-Ranges"] = "bytes"
+        return response
+
+    size = stat_result.st_size
+    if_range = request.META.get("HTTP_IF_RANGE")
+    try:
+        byte_range = (
+            parse_range(request.META.get("HTTP_RANGE"), size)
+            if not if_range or if_range in (etag, http_date(stat_result.st_mtime))
+            else None
+        )
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    if byte_range is None:
+        response = FileResponse(
+            open(fullpath, "rb"), filename=os.path.basename(fullpath)
+        )
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read(open(fullpath, "rb"), start, end - start + 1), status=206
+        )
+        response["Content-Length"] = end - start + 1
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    mode = settings.MEDIA_SERVE_MODE
+    if mode == "static":
+        return static_serve(request, path, document_root=settings.MEDIA_ROOT)
+
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+        stat_result = os.stat(fullpath)
+    except OSError:
+        raise Http404("File not found")
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise Http404("File not found")
+
+    # Each precompressed variant is its own representation with its own
+    # ETag, so a validator never stands for bytes in a different encoding.
+    encoding, sendpath = (
+        _precompressed(request, fullpath) if mode == "django" else (None, fullpath)
+    )
+    etag = _etag(stat_result, encoding)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat_result.st_mtime)
+    )
+    if response is None:
+        if mode == "x-accel":
+            response = HttpResponse()
+            response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_REDIRECT_PREFIX + path
+        elif mode == "sendfile":
+            response = HttpResponse()
+            response["X-Sendfile"] = fullpath
+        else:
+            response = _file_response(
+                request, fullpath, sendpath, encoding, stat_result, etag
+            )
+        content_type, _ = mimetypes.guess_type(fullpath)
+        response["Content-Type"] = content_type or "application/octet-stream"
+
+    if mode == "django":
+        patch_vary_headers(response, ["Accept-Encoding"])
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stat_result.st_mtime)
+    response["Cache-Control"] = cache_control(path)
+    return response
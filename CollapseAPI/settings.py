@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from urllib.parse import urlsplit
 
 from dotenv import load_dotenv
 
@@ -9,6 +10,9 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 DEBUG = os.getenv("DJANGO_DEBUG", "True") == "True"
+# Native async views for the launch/download endpoints; CollapseAPI/asgi.py
+# turns this on, WSGI servers keep plain sync views.
+ASYNC_VIEWS = os.getenv("DJANGO_ASYNC_VIEWS", "False") == "True"
 
 ALLOWED_HOSTS = ["*"]
 
@@ -73,7 +77,10 @@ MIDDLEWARE = [
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.DjangoModelPermissionsOrAnonReadOnly"
-    ]
+    ],
+    # The browsable API is only offered while debugging
+    "DEFAULT_RENDERER_CLASSES": ["clients.renderers.FastJSONRenderer"]
+    + (["rest_framework.renderers.BrowsableAPIRenderer"] if DEBUG else []),
 }
 
 ROOT_URLCONF = "CollapseAPI.urls"
@@ -96,19 +103,137 @@ TEMPLATES = [
 WSGI_APPLICATION = "CollapseAPI.wsgi.application"
 
 
+# Both databases use CollapseAPI.sqlite, which applies PRAGMAS to every new
+# connection and begins transactions with TRANSACTION_MODE. WAL lets the
+# statistics writers and the API readers work on the same file concurrently.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 10000,
+    "temp_store": "MEMORY",
+}
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
+        "ENGINE": "CollapseAPI.sqlite",
         "NAME": BASE_DIR / "db.sqlite3",
+        "TRANSACTION_MODE": "IMMEDIATE",
+        "PRAGMAS": {
+            **SQLITE_PRAGMAS,
+            "cache_size": -16000,
+            "mmap_size": 64 * 1024 * 1024,
+        },
+        # The apps have no committed migrations; build test tables from the models.
+        "TEST": {"MIGRATE": False},
     },
     "statistics": {
-        "ENGINE": "django.db.backends.sqlite3",
+        "ENGINE": "CollapseAPI.sqlite",
         "NAME": BASE_DIR / "statistics.sqlite3",
+        "TRANSACTION_MODE": "IMMEDIATE",
+        "PRAGMAS": {
+            **SQLITE_PRAGMAS,
+            "cache_size": -32000,
+            "mmap_size": 256 * 1024 * 1024,
+        },
+        # The apps have no committed migrations; build test tables from the models.
+        # A file rather than shared-cache memory, so concurrent writers wait on
+        # busy_timeout like in production instead of failing with "table is locked".
+        "TEST": {"MIGRATE": False, "NAME": BASE_DIR / "test_statistics.sqlite3"},
     },
 }
 
 DATABASE_ROUTERS = ["client_statistics.routers.StatisticsRouter"]
 
+# Minutes between WAL checkpoints and PRAGMA optimize runs.
+SQLITE_MAINTENANCE_INTERVAL = int(os.getenv("SQLITE_MAINTENANCE_INTERVAL", "30"))
+
+# Launch/download counters are buffered in memory and flushed in batches.
+# Set STATS_FLUSH_INTERVAL_MS to 0 to write every increment immediately.
+STATS_FLUSH_INTERVAL_MS = int(os.getenv("STATS_FLUSH_INTERVAL_MS", "1000"))
+STATS_FLUSH_MAX_EVENTS = int(os.getenv("STATS_FLUSH_MAX_EVENTS", "500"))
+# Seconds the /api/statistics totals may be served from memory.
+STATS_TOTALS_MAX_AGE = int(os.getenv("STATS_TOTALS_MAX_AGE", "10"))
+
+# Limits of POST /api/stats/batch, and how long event ids are kept for deduplication.
+STATS_BATCH_MAX_EVENTS = int(os.getenv("STATS_BATCH_MAX_EVENTS", "1000"))
+STATS_BATCH_MAX_COUNT = int(os.getenv("STATS_BATCH_MAX_COUNT", "1000"))
+STATS_EVENT_RETENTION_DAYS = int(os.getenv("STATS_EVENT_RETENTION_DAYS", "30"))
+
+# Launch/download history is kept per minute and rolled up into hours and days.
+# A retention of 0 keeps the buckets forever.
+STATS_ROLLUP_LOOKBACK_HOURS = int(os.getenv("STATS_ROLLUP_LOOKBACK_HOURS", "3"))
+STATS_MINUTE_RETENTION_HOURS = int(os.getenv("STATS_MINUTE_RETENTION_HOURS", "48"))
+STATS_HOURLY_RETENTION_DAYS = int(os.getenv("STATS_HOURLY_RETENTION_DAYS", "90"))
+STATS_DAILY_RETENTION_DAYS = int(os.getenv("STATS_DAILY_RETENTION_DAYS", "0"))
+
+# File touched whenever a Client changes, so every worker process can tell
+# when its in-memory client registry and catalog snapshot are out of date.
+CLIENT_VERSION_STAMP = os.getenv(
+    "CLIENT_VERSION_STAMP", os.path.join(BASE_DIR, ".clients_version")
+)
+# Same for clients, news, changelogs and screenshots, for the cached views.
+CONTENT_VERSION_STAMP = os.getenv(
+    "CONTENT_VERSION_STAMP", os.path.join(BASE_DIR, ".content_version")
+)
+CLIENT_VERSION_CHECK_INTERVAL = float(os.getenv("CLIENT_VERSION_CHECK_INTERVAL", "1"))
+
+# Seconds before the pre-rendered /clients/ snapshot is rebuilt to pick up new counts.
+CATALOG_MAX_AGE = int(os.getenv("CATALOG_MAX_AGE", "60"))
+
+# ?since= change feeds hand out cursors this many seconds in the past, and
+# remember deletions for this many days; older cursors get a full reset.
+SYNC_CURSOR_LAG = int(os.getenv("SYNC_CURSOR_LAG", "2"))
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv("SYNC_TOMBSTONE_RETENTION_DAYS", "90"))
+
+CDN_BASE_URL = os.getenv("CDN_BASE_URL", "https://cdn.collapseloader.org")
+# Background CDN metadata resolution retries with exponential backoff from this delay.
+CDN_METADATA_MAX_ATTEMPTS = int(os.getenv("CDN_METADATA_MAX_ATTEMPTS", "5"))
+CDN_METADATA_RETRY_DELAY = int(os.getenv("CDN_METADATA_RETRY_DELAY", "30"))
+
+# Outbound HTTP (CDN, heartbeat) goes through one pooled keep-alive session.
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+HTTP_HOST_POOL_SIZES = {
+    urlsplit(CDN_BASE_URL).netloc: int(os.getenv("HTTP_CDN_POOL_SIZE", "16")),
+}
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.5"))
+
+# Rendered read endpoints are cached per process in "default" and, with
+# CACHE_SHARED=file or CACHE_SHARED=redis://..., in a "shared" tier that
+# every worker reads, so a response is computed once for all of them.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "collapseapi",
+        "OPTIONS": {"MAX_ENTRIES": 2000},
+    },
+}
+CACHE_SHARED = os.getenv("CACHE_SHARED", "")
+if CACHE_SHARED == "file":
+    CACHES["shared"] = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv("CACHE_DIR", os.path.join(BASE_DIR, ".cache")),
+    }
+elif CACHE_SHARED.startswith(("redis://", "rediss://")):
+    CACHES["shared"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": CACHE_SHARED,
+    }
+CACHE_VIEW_TIMEOUT = int(os.getenv("CACHE_VIEW_TIMEOUT", "300"))
+# How long other workers wait for the one recomputing a missing response.
+CACHE_LOCK_TIMEOUT = int(os.getenv("CACHE_LOCK_TIMEOUT", "10"))
+
+# Cache-Control for read endpoints as (max-age, stale-while-revalidate) in seconds.
+HTTP_CACHE_TIMEOUTS = {
+    "clients": (60, 300),
+    "news": (300, 3600),
+    "client_detailed": (300, 3600),
+    "client_screenshots": (300, 3600),
+    "statistics": (30, 60),
+    "bootstrap": (30, 60),
+    "changelog": (300, 3600),
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -140,6 +265,31 @@ STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 
 MEDIA_URL = "media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
+# How /media/ files are sent: "django" (in-process), "x-accel" (nginx),
+# "sendfile" (Apache/lighttpd X-Sendfile) or "static" (django.views.static.serve).
+MEDIA_SERVE_MODE = os.getenv("MEDIA_SERVE_MODE", "django")
+MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv(
+    "MEDIA_ACCEL_REDIRECT_PREFIX", "/protected-media/"
+)
+# Cache-Control max-age for media that isn't content-addressed.
+MEDIA_CACHE_MAX_AGE = int(os.getenv("MEDIA_CACHE_MAX_AGE", "3600"))
+
+# Screenshot renditions as {size: (max width, max height)} and {format: quality}.
+# Formats the installed Pillow can't encode (e.g. AVIF) are skipped.
+SCREENSHOT_RENDITION_SIZES = {
+    "thumb": (320, 180),
+    "medium": (960, 540),
+    "full": (1920, 1080),
+}
+SCREENSHOT_RENDITION_FORMATS = {
+    "webp": 80,
+    "avif": 60,
+}
+
+# Screenshot optimization runs on a pool of this many worker processes.
+SCREENSHOT_PROCESS_WORKERS = int(
+    os.getenv("SCREENSHOT_PROCESS_WORKERS", str(min(2, os.cpu_count() or 1)))
+)
 
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 WHITENOISE_MANIFEST_STRICT = False
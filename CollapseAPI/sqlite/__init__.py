@@ -0,0 +1,40 @@
+"""
+SQLite backend tuned for concurrent access.
+
+Use ``"ENGINE": "CollapseAPI.sqlite"`` in ``DATABASES``. Each alias may set
+``PRAGMAS``, applied to every new connection, and ``TRANSACTION_MODE``
+(``DEFERRED``, ``IMMEDIATE`` or ``EXCLUSIVE``) used to begin transactions.
+"""
+
+from django.conf import settings
+from django.db import connections
+from django_apscheduler.util import close_old_connections
+
+
+def sqlite_aliases():
+    return [
+        alias
+        for alias, database in settings.DATABASES.items()
+        if database["ENGINE"] == __name__
+    ]
+
+
+@close_old_connections
+def maintain():
+    """Checkpoint the WAL back into the database file and refresh planner statistics"""
+    for alias in sqlite_aliases():
+        with connections[alias].cursor() as cursor:
+            cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            cursor.execute("PRAGMA optimize")
+
+
+def start():
+    from clients.scheduler import scheduler
+
+    scheduler.add_job(
+        maintain,
+        "interval",
+        minutes=settings.SQLITE_MAINTENANCE_INTERVAL,
+        id="sqlite_maintenance",
+        replace_existing=True,
+    )
@@ -0,0 +1,16 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.settings_dict.get("PRAGMAS", {}).items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        # A deferred transaction that reads before writing can't wait for the
+        # write lock and fails with "database is locked" straight away;
+        # IMMEDIATE takes the lock up front so busy_timeout applies.
+        mode = self.settings_dict.get("TRANSACTION_MODE", "DEFERRED")
+        self.cursor().execute(f"BEGIN {mode}")
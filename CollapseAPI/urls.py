@@ -1,15 +1,12 @@
-from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path, re_path
-from django.views.static import serve
 from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 
-from CollapseAPI.settings import MEDIA_ROOT, STATIC_ROOT
+from CollapseAPI.media import serve_media
 from clients.api import *
-from clients.serializers import router
+from clients.serializers import ChangelogEntryList, router
 
 schema_view = get_schema_view(
     openapi.Info(
@@ -38,8 +35,15 @@ urlpatterns = [
     path(
         "api/client/<int:client_id>/detailed", client_detailed, name="client_detailed"
     ),
+    path(
+        "api/client/<int:client_id>/changelog",
+        ChangelogEntryList.as_view(),
+        name="client_changelog",
+    ),
     path("api/loader/launch", loader_launch, name="loader_launch"),
+    path("api/stats/batch", stats_batch, name="stats_batch"),
     path("api/statistics", statistics, name="statistics"),
+    path("api/bootstrap", bootstrap, name="bootstrap"),
     path("admin/", admin.site.urls),
     # SWAG $$$
     path(
@@ -51,7 +55,6 @@ urlpatterns = [
         name="schema-swagger-ui",
     ),
     path("redoc/", schema_view.with_ui("redoc", cache_timeout=0), name="schema-redoc"),
-    # shitcoded static serving $$$
-    re_path(r"^media/(?P<path>.*)$", serve, {"document_root": MEDIA_ROOT}),
-    re_path(r"^static/(?P<path>.*)$", serve, {"document_root": STATIC_ROOT}),
+    # static files are served by WhiteNoiseMiddleware
+    re_path(r"^media/(?P<path>.*)$", serve_media, name="media"),
 ]
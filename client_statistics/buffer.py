@@ -0,0 +1,227 @@
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+
+from client_statistics.models import (
+    ClientDownloadStats,
+    ClientLaunchStats,
+    LoaderLaunchStats,
+    MinuteStats,
+    StatsBucket,
+    StatsTotal,
+)
+
+logger = logging.getLogger(__name__)
+
+LAUNCH = StatsBucket.LAUNCH
+DOWNLOAD = StatsBucket.DOWNLOAD
+LOADER = StatsBucket.LOADER
+
+
+def write_counts(counts, history=None):
+    """
+    Write a batch of ``{(kind, client_id): count}`` increments, and optionally
+    their ``{(kind, client_id, minute): count}`` history, to the statistics
+    database in a single transaction and return the new totals for those keys.
+    """
+    by_kind = defaultdict(dict)
+    for (kind, client_id), count in counts.items():
+        by_kind[kind][client_id] = count
+
+    totals = {}
+    with transaction.atomic(using="statistics"):
+        if by_kind[LAUNCH]:
+            for client_id, total in ClientLaunchStats.apply_increments(
+                by_kind[LAUNCH]
+            ).items():
+                totals[(LAUNCH, client_id)] = total
+        if by_kind[DOWNLOAD]:
+            for client_id, total in ClientDownloadStats.apply_increments(
+                by_kind[DOWNLOAD]
+            ).items():
+                totals[(DOWNLOAD, client_id)] = total
+        if by_kind[LOADER]:
+            totals[(LOADER, None)] = LoaderLaunchStats.apply_increment(
+                by_kind[LOADER][None]
+            )
+        if history:
+            MinuteStats.add_counts(history)
+    return totals
+
+
+def load_totals():
+    """Read the persisted totals for every counter"""
+    totals = {}
+    for client_id, launches in ClientLaunchStats.objects.using(
+        "statistics"
+    ).values_list("client_id", "launches"):
+        totals[(LAUNCH, client_id)] = launches
+    for client_id, downloads in ClientDownloadStats.objects.using(
+        "statistics"
+    ).values_list("client_id", "downloads"):
+        totals[(DOWNLOAD, client_id)] = downloads
+    totals[(LOADER, None)] = LoaderLaunchStats.get_total_launches()
+    return totals
+
+
+_cached_totals = (0.0, None)
+
+
+def get_totals():
+    """
+    Get the running ``{kind: total}`` counters, read from the database at most
+    once every ``STATS_TOTALS_MAX_AGE`` seconds per process.
+    """
+    global _cached_totals
+    expires, totals = _cached_totals
+    if totals is None or time.monotonic() >= expires:
+        totals = StatsTotal.get_totals()
+        _cached_totals = (time.monotonic() + settings.STATS_TOTALS_MAX_AGE, totals)
+    return totals
+
+
+class CounterBuffer:
+    """
+    Write-behind buffer for the launch/download counters.
+
+    Increments are accumulated in memory per ``(kind, client_id)`` and written
+    to the statistics database in one transaction every
+    ``STATS_FLUSH_INTERVAL_MS`` milliseconds, or as soon as
+    ``STATS_FLUSH_MAX_EVENTS`` increments are pending. Counts returned by
+    ``increment`` are the last persisted total plus whatever this process has
+    not flushed yet, so they are approximate when several workers are running.
+    Each increment is also counted in a per-minute history bucket.
+    """
+
+    def __init__(self, flush_interval_ms=None, flush_events=None):
+        self._flush_interval_ms = flush_interval_ms
+        self._flush_events = flush_events
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = defaultdict(int)
+        self._history = defaultdict(int)
+        self._pending_events = 0
+        self._inflight = {}
+        self._totals = None
+        self._wakeup = threading.Event()
+        self._pid = None
+
+    @property
+    def flush_interval(self):
+        if self._flush_interval_ms is None:
+            return settings.STATS_FLUSH_INTERVAL_MS / 1000
+        return self._flush_interval_ms / 1000
+
+    @property
+    def flush_events(self):
+        if self._flush_events is None:
+            return settings.STATS_FLUSH_MAX_EVENTS
+        return self._flush_events
+
+    def increment(self, kind, client_id=None, count=1):
+        """Buffer ``count`` increments and return the approximate running total"""
+        self._ensure_totals()
+        key = (kind, client_id)
+        minute = int(time.time()) // 60 * 60
+
+        with self._lock:
+            self._pending[key] += count
+            self._history[(kind, client_id, minute)] += count
+            self._pending_events += count
+            should_flush = self._pending_events >= self.flush_events
+
+        if self.flush_interval <= 0:
+            self.flush()
+        else:
+            self._ensure_worker()
+            if should_flush:
+                self._wakeup.set()
+
+        return self.count(kind, client_id)
+
+    async def aincrement(self, kind, client_id=None, count=1):
+        """``increment`` for async views; only hops to a thread when it has to hit the database"""
+        if self._totals is None or self.flush_interval <= 0:
+            return await sync_to_async(self.increment)(kind, client_id, count)
+        return self.increment(kind, client_id, count)
+
+    def record_totals(self, totals):
+        """Remember ``{(kind, client_id): total}`` persisted outside of this buffer"""
+        self._ensure_totals()
+        with self._lock:
+            self._totals.update(totals)
+
+    def count(self, kind, client_id=None):
+        """Return the approximate running total for a counter"""
+        self._ensure_totals()
+        key = (kind, client_id)
+        with self._lock:
+            return (
+                self._totals.get(key, 0)
+                + self._inflight.get(key, 0)
+                + self._pending.get(key, 0)
+            )
+
+    def flush(self):
+        """Write every pending increment to the statistics database"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                batch = dict(self._pending)
+                history = dict(self._history)
+                self._pending.clear()
+                self._history.clear()
+                self._pending_events = 0
+                self._inflight = batch
+
+            try:
+                totals = write_counts(batch, history)
+            except Exception:
+                logger.exception("Failed to flush %d statistics counters", len(batch))
+                with self._lock:
+                    for key, count in batch.items():
+                        self._pending[key] += count
+                        self._pending_events += count
+                    for key, count in history.items():
+                        self._history[key] += count
+                    self._inflight = {}
+                return
+
+            with self._lock:
+                self._totals.update(totals)
+                self._inflight = {}
+
+    def _ensure_totals(self):
+        if self._totals is not None:
+            return
+        with self._flush_lock:
+            if self._totals is None:
+                self._totals = load_totals()
+
+    def _ensure_worker(self):
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            threading.Thread(target=self._run, name="stats-flush", daemon=True).start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+counter_buffer = CounterBuffer()
+atexit.register(counter_buffer.flush)
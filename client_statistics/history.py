@@ -0,0 +1,95 @@
+import time
+
+from django.conf import settings
+from django.db import connections, transaction
+from django_apscheduler.util import close_old_connections
+
+from client_statistics.models import DailyStats, HourlyStats, MinuteStats, StatsTotal
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+def _rollup(cursor, source, target, width, since):
+    """
+    Recompute the ``target`` buckets starting at or after ``since`` from the
+    finer ``source`` buckets. Recomputing instead of adding keeps the rollup
+    idempotent, so overlapping runs never double count.
+    """
+    cursor.execute(
+        f"INSERT INTO {target._meta.db_table} (kind, client_id, bucket, count) "
+        f"SELECT kind, client_id, bucket / {width} * {width} AS start, SUM(count) "
+        f"FROM {source._meta.db_table} WHERE bucket >= %s "
+        "GROUP BY kind, client_id, start "
+        "ON CONFLICT (kind, client_id, bucket) DO UPDATE SET count = excluded.count",
+        [since],
+    )
+
+
+def _expire(cursor, model, retention, now):
+    if retention:
+        cursor.execute(
+            f"DELETE FROM {model._meta.db_table} WHERE bucket < %s", [now - retention]
+        )
+
+
+@close_old_connections
+def compact(now=None):
+    """
+    Roll minute buckets up into hours and hours up into days, then drop
+    buckets older than their retention period.
+    """
+    now = int(now or time.time())
+    hour_start = now // HOUR * HOUR
+    day_start = now // DAY * DAY
+
+    with transaction.atomic(using="statistics"):
+        with connections["statistics"].cursor() as cursor:
+            _rollup(
+                cursor,
+                MinuteStats,
+                HourlyStats,
+                HOUR,
+                hour_start - settings.STATS_ROLLUP_LOOKBACK_HOURS * HOUR,
+            )
+            _rollup(cursor, HourlyStats, DailyStats, DAY, day_start - DAY)
+            _expire(
+                cursor, MinuteStats, settings.STATS_MINUTE_RETENTION_HOURS * HOUR, now
+            )
+            _expire(
+                cursor, HourlyStats, settings.STATS_HOURLY_RETENTION_DAYS * DAY, now
+            )
+            _expire(cursor, DailyStats, settings.STATS_DAILY_RETENTION_DAYS * DAY, now)
+
+
+@close_old_connections
+def reconcile_totals():
+    """Recompute the running totals from the counter tables"""
+    StatsTotal.recompute()
+
+
+def start():
+    from client_statistics.ingest import expire_events
+    from clients.scheduler import scheduler
+
+    scheduler.add_job(
+        compact,
+        "interval",
+        minutes=5,
+        id="compact_stats_history",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        reconcile_totals,
+        "interval",
+        hours=1,
+        id="reconcile_stats_totals",
+        replace_existing=True,
+    )
+    scheduler.add_job(
+        expire_events,
+        "interval",
+        hours=1,
+        id="expire_ingested_events",
+        replace_existing=True,
+    )
@@ -0,0 +1,103 @@
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django_apscheduler.util import close_old_connections
+
+from client_statistics.buffer import LOADER, counter_buffer, write_counts
+from client_statistics.models import IngestedEvent, StatsBucket
+
+KINDS = {kind for kind, label in StatsBucket.KIND_CHOICES}
+
+
+class InvalidBatch(ValueError):
+    pass
+
+
+def parse_events(payload):
+    """
+    Validate a batch of ``{client_id, kind, count, event_id}`` records and
+    return them as ``(event_id, kind, client_id, count)`` tuples.
+    Raises ``InvalidBatch`` describing the first malformed record.
+    """
+    if not isinstance(payload, list):
+        raise InvalidBatch("Expected a JSON array of events")
+    if len(payload) > settings.STATS_BATCH_MAX_EVENTS:
+        raise InvalidBatch(
+            f"At most {settings.STATS_BATCH_MAX_EVENTS} events per batch"
+        )
+
+    events = []
+    for index, record in enumerate(payload):
+        if not isinstance(record, dict):
+            raise InvalidBatch(f"Event {index} is not an object")
+        event_id = record.get("event_id")
+        kind = record.get("kind")
+        client_id = record.get("client_id")
+        count = record.get("count", 1)
+
+        if not isinstance(event_id, str) or not 0 < len(event_id) <= 64:
+            raise InvalidBatch(f"Event {index} needs an event_id of 1-64 characters")
+        if kind not in KINDS:
+            raise InvalidBatch(f"Event {index} has an unknown kind {kind!r}")
+        if kind == LOADER:
+            client_id = None
+        elif not isinstance(client_id, int) or isinstance(client_id, bool):
+            raise InvalidBatch(f"Event {index} needs an integer client_id")
+        if (
+            not isinstance(count, int)
+            or isinstance(count, bool)
+            or not 0 < count <= settings.STATS_BATCH_MAX_COUNT
+        ):
+            raise InvalidBatch(
+                f"Event {index} needs a count between 1 and {settings.STATS_BATCH_MAX_COUNT}"
+            )
+        events.append((event_id, kind, client_id, count))
+    return events
+
+
+def ingest_events(events):
+    """
+    Apply ``(event_id, kind, client_id, count)`` events in a single transaction,
+    skipping event ids that were already ingested. Returns the ids of the
+    events that were applied.
+    """
+    minute = int(time.time()) // 60 * 60
+
+    with transaction.atomic(using="statistics"):
+        seen = set(
+            IngestedEvent.objects.using("statistics")
+            .filter(event_id__in=[event[0] for event in events])
+            .values_list("event_id", flat=True)
+        )
+
+        applied = []
+        counts = defaultdict(int)
+        history = defaultdict(int)
+        for event_id, kind, client_id, count in events:
+            if event_id in seen:
+                continue
+            seen.add(event_id)
+            applied.append(event_id)
+            counts[(kind, client_id)] += count
+            history[(kind, client_id, minute)] += count
+
+        totals = {}
+        if applied:
+            IngestedEvent.objects.using("statistics").bulk_create(
+                [IngestedEvent(event_id=event_id) for event_id in applied]
+            )
+            totals = write_counts(counts, history)
+
+    counter_buffer.record_totals(totals)
+    return applied
+
+
+@close_old_connections
+def expire_events():
+    """Forget ingested event ids older than STATS_EVENT_RETENTION_DAYS"""
+    cutoff = timezone.now() - timedelta(days=settings.STATS_EVENT_RETENTION_DAYS)
+    IngestedEvent.objects.using("statistics").filter(received_at__lt=cutoff).delete()
@@ -0,0 +1,123 @@
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+from django.db.models import Sum
+
+from client_statistics.buffer import LAUNCH, write_counts
+from client_statistics.models import (
+    ClientDownloadStats,
+    ClientLaunchStats,
+    DailyStats,
+    HourlyStats,
+    LoaderLaunchStats,
+    MinuteStats,
+    StatsTotal,
+)
+
+MODELS = [
+    ClientLaunchStats,
+    ClientDownloadStats,
+    LoaderLaunchStats,
+    MinuteStats,
+    HourlyStats,
+    DailyStats,
+    StatsTotal,
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark statistics writes against concurrent readers on a scratch copy "
+        "of the statistics database schema."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=4)
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--seconds", type=float, default=5.0)
+        parser.add_argument("--clients", type=int, default=50)
+        parser.add_argument(
+            "--baseline",
+            action="store_true",
+            help="Use SQLite defaults (rollback journal, deferred transactions) for comparison.",
+        )
+
+    def handle(self, *args, **options):
+        directory = tempfile.mkdtemp(prefix="bench_stats_")
+        database = connections.settings["statistics"]
+        connections["statistics"].close()
+        database["NAME"] = os.path.join(directory, "statistics.sqlite3")
+        if options["baseline"]:
+            database.pop("PRAGMAS", None)
+            database.pop("TRANSACTION_MODE", None)
+
+        with connections["statistics"].schema_editor() as editor:
+            for model in MODELS:
+                editor.create_model(model)
+
+        client_ids = range(1, options["clients"] + 1)
+        deadline = time.monotonic() + options["seconds"]
+        counters = {"writes": 0, "reads": 0, "locked": 0}
+        lock = threading.Lock()
+
+        def count(name):
+            with lock:
+                counters[name] += 1
+
+        def writer():
+            while time.monotonic() < deadline:
+                try:
+                    write_counts({(LAUNCH, random.choice(client_ids)): 1})
+                    count("writes")
+                except OperationalError:
+                    count("locked")
+            connections.close_all()
+
+        def reader():
+            while time.monotonic() < deadline:
+                try:
+                    StatsTotal.get_totals()
+                    ClientLaunchStats.get_launches_for(client_ids)
+                    count("reads")
+                except OperationalError:
+                    count("locked")
+            connections.close_all()
+
+        threads = [threading.Thread(target=writer) for _ in range(options["writers"])]
+        threads += [threading.Thread(target=reader) for _ in range(options["readers"])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with connections["statistics"].cursor() as cursor:
+            journal_mode = cursor.execute("PRAGMA journal_mode").fetchone()[0]
+        stored = (
+            ClientLaunchStats.objects.using("statistics").aggregate(
+                total=Sum("launches")
+            )["total"]
+            or 0
+        )
+        total = StatsTotal.get_totals().get(LAUNCH, 0)
+        connections["statistics"].close()
+        shutil.rmtree(directory, ignore_errors=True)
+        seconds = options["seconds"]
+        self.stdout.write(
+            f"journal_mode={journal_mode}, {options['writers']} writers, "
+            f"{options['readers']} readers, {seconds:g}s: "
+            f"{counters['writes'] / seconds:.0f} launches/s, "
+            f"{counters['reads'] / seconds:.0f} reads/s, "
+            f"{counters['locked']} 'database is locked' errors"
+        )
+        if stored != counters["writes"] or total != counters["writes"]:
+            raise CommandError(
+                f"Lost updates: {counters['writes']} launches written, "
+                f"{stored} stored per client, {total} in the running total"
+            )
+        self.stdout.write(f"No lost updates: {stored} launches stored")
@@ -1,7 +1,33 @@
-from django.db import models, transaction
+from datetime import datetime
+from datetime import timezone as dt_timezone
+
+from django.db import connections, models, transaction
+from django.utils import timezone
 from django_unixdatetimefield import UnixDateTimeField
 
 
+def upsert_increments(model, counter, timestamp, counts):
+    """
+    Add ``{client_id: count}`` to ``counter`` with a single
+    ``INSERT ... ON CONFLICT DO UPDATE ... RETURNING`` per client, creating
+    missing rows, and return the new totals.
+    """
+    connection = connections["statistics"]
+    now = model._meta.get_field(timestamp).get_db_prep_save(timezone.now(), connection)
+    sql = (
+        f"INSERT INTO {model._meta.db_table} (client_id, {counter}, {timestamp}) "
+        "VALUES (%s, %s, %s) ON CONFLICT (client_id) DO UPDATE SET "
+        f"{counter} = {counter} + excluded.{counter}, {timestamp} = excluded.{timestamp} "
+        f"RETURNING {counter}"
+    )
+    totals = {}
+    with connection.cursor() as cursor:
+        for client_id, count in counts.items():
+            cursor.execute(sql, [client_id, count, now])
+            totals[client_id] = cursor.fetchone()[0]
+    return totals
+
+
 class ClientLaunchStats(models.Model):
     client_id = models.IntegerField(
         unique=True, help_text="ID of the client", db_index=True
@@ -21,19 +47,32 @@ class ClientLaunchStats(models.Model):
 
     def increment_launches(self):
         """Atomically increment the launches counter"""
-        with transaction.atomic():
-            self.launches = models.F("launches") + 1
-            self.save(update_fields=["launches", "last_launched_at"])
-            self.refresh_from_db()
+        self.launches = self.record_launch(self.client_id)
         return self.launches
 
     @classmethod
     def record_launch(cls, client_id):
         """Record a launch for the given client_id"""
-        obj, created = cls.objects.using("statistics").get_or_create(
-            client_id=client_id, defaults={"launches": 0}
-        )
-        return obj.increment_launches()
+        return cls.apply_increments({client_id: 1})[client_id]
+
+    @classmethod
+    def apply_increments(cls, counts):
+        """
+        Apply a batch of ``{client_id: count}`` increments, add them to the
+        running total and return the new per-client totals.
+        """
+        with transaction.atomic(using="statistics", savepoint=False):
+            totals = upsert_increments(cls, "launches", "last_launched_at", counts)
+            StatsTotal.add(StatsBucket.LAUNCH, sum(counts.values()))
+        return totals
+
+    @classmethod
+    def get_launches_for(cls, client_ids=None):
+        """Get ``{client_id: launches}`` for the given clients (or all) in one query"""
+        queryset = cls.objects.using("statistics")
+        if client_ids is not None:
+            queryset = queryset.filter(client_id__in=client_ids)
+        return dict(queryset.values_list("client_id", "launches"))
 
     @staticmethod
     def get_total_launches():
@@ -65,19 +104,32 @@ class ClientDownloadStats(models.Model):
 
     def increment_downloads(self):
         """Atomically increment the downloads counter"""
-        with transaction.atomic():
-            self.downloads = models.F("downloads") + 1
-            self.save(update_fields=["downloads", "last_downloaded_at"])
-            self.refresh_from_db()
+        self.downloads = self.record_download(self.client_id)
         return self.downloads
 
     @classmethod
     def record_download(cls, client_id):
         """Record a download for the given client_id"""
-        obj, created = cls.objects.using("statistics").get_or_create(
-            client_id=client_id, defaults={"downloads": 0}
-        )
-        return obj.increment_downloads()
+        return cls.apply_increments({client_id: 1})[client_id]
+
+    @classmethod
+    def apply_increments(cls, counts):
+        """
+        Apply a batch of ``{client_id: count}`` increments, add them to the
+        running total and return the new per-client totals.
+        """
+        with transaction.atomic(using="statistics", savepoint=False):
+            totals = upsert_increments(cls, "downloads", "last_downloaded_at", counts)
+            StatsTotal.add(StatsBucket.DOWNLOAD, sum(counts.values()))
+        return totals
+
+    @classmethod
+    def get_downloads_for(cls, client_ids=None):
+        """Get ``{client_id: downloads}`` for the given clients (or all) in one query"""
+        queryset = cls.objects.using("statistics")
+        if client_ids is not None:
+            queryset = queryset.filter(client_id__in=client_ids)
+        return dict(queryset.values_list("client_id", "downloads"))
 
     @staticmethod
     def get_total_downloads():
@@ -106,19 +158,38 @@ class LoaderLaunchStats(models.Model):
 
     def increment_launches(self):
         """Atomically increment the launches counter"""
-        with transaction.atomic():
-            self.launches = models.F("launches") + 1
-            self.save(update_fields=["launches", "last_launched_at"])
-            self.refresh_from_db()
+        self.launches = self.record_launch()
         return self.launches
 
     @classmethod
     def record_launch(cls):
-        """Record a launch for the given loader_id"""
-        obj, created = cls.objects.using("statistics").get_or_create(
-            defaults={"launches": 0}
+        """Record a loader launch"""
+        return cls.apply_increment(1)
+
+    @classmethod
+    def apply_increment(cls, count):
+        """
+        Add ``count`` launches to the loader counter and its running total,
+        and return the new total. The counter is the oldest row; a single
+        UPSERT creates it if missing.
+        """
+        connection = connections["statistics"]
+        now = cls._meta.get_field("last_launched_at").get_db_prep_save(
+            timezone.now(), connection
         )
-        return obj.increment_launches()
+        table = cls._meta.db_table
+        with transaction.atomic(using="statistics", savepoint=False):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {table} (id, launches, last_launched_at) "
+                    f"VALUES (COALESCE((SELECT MIN(id) FROM {table}), 1), %s, %s) "
+                    "ON CONFLICT (id) DO UPDATE SET launches = launches + excluded.launches, "
+                    "last_launched_at = excluded.last_launched_at RETURNING launches",
+                    [count, now],
+                )
+                total = cursor.fetchone()[0]
+            StatsTotal.add(StatsBucket.LOADER, count)
+        return total
 
     @staticmethod
     def get_total_launches():
@@ -129,3 +200,154 @@ class LoaderLaunchStats(models.Model):
             )["total_launches"]
             or 0
         )
+
+
+class StatsBucket(models.Model):
+    LAUNCH = "launch"
+    DOWNLOAD = "download"
+    LOADER = "loader"
+    KIND_CHOICES = [
+        (LAUNCH, "Client launch"),
+        (DOWNLOAD, "Client download"),
+        (LOADER, "Loader launch"),
+    ]
+
+    kind = models.CharField(
+        max_length=10, choices=KIND_CHOICES, help_text="What was counted"
+    )
+    client_id = models.IntegerField(
+        default=0, help_text="ID of the client (0 for loader launches)"
+    )
+    bucket = models.PositiveIntegerField(
+        help_text="Start of the bucket as a Unix timestamp"
+    )
+    count = models.PositiveIntegerField(
+        default=0, help_text="Number of events in the bucket"
+    )
+
+    class Meta:
+        abstract = True
+        unique_together = ["kind", "client_id", "bucket"]
+        ordering = ["bucket"]
+
+    @classmethod
+    def get_series(cls, kind, client_id=0, since=None):
+        """Get ``[(bucket_start, count)]`` for one counter, oldest first"""
+        buckets = cls.objects.using("statistics").filter(kind=kind, client_id=client_id)
+        if since is not None:
+            buckets = buckets.filter(bucket__gte=int(since.timestamp()))
+        return [
+            (datetime.fromtimestamp(bucket, tz=dt_timezone.utc), count)
+            for bucket, count in buckets.values_list("bucket", "count")
+        ]
+
+
+class MinuteStats(StatsBucket):
+    class Meta(StatsBucket.Meta):
+        db_table = "stats_minutes"
+        verbose_name = "Per-minute Statistics"
+        verbose_name_plural = "Per-minute Statistics"
+
+    @classmethod
+    def add_counts(cls, counts):
+        """Add a batch of ``{(kind, client_id, bucket): count}`` to the minute buckets"""
+        with connections["statistics"].cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {cls._meta.db_table} (kind, client_id, bucket, count) "
+                "VALUES (%s, %s, %s, %s) "
+                "ON CONFLICT (kind, client_id, bucket) "
+                "DO UPDATE SET count = count + excluded.count",
+                [
+                    (kind, client_id or 0, bucket, count)
+                    for (kind, client_id, bucket), count in counts.items()
+                ],
+            )
+
+
+class HourlyStats(StatsBucket):
+    class Meta(StatsBucket.Meta):
+        db_table = "stats_hours"
+        verbose_name = "Hourly Statistics"
+        verbose_name_plural = "Hourly Statistics"
+
+
+class DailyStats(StatsBucket):
+    class Meta(StatsBucket.Meta):
+        db_table = "stats_days"
+        verbose_name = "Daily Statistics"
+        verbose_name_plural = "Daily Statistics"
+
+
+class StatsTotal(models.Model):
+    kind = models.CharField(
+        max_length=10,
+        unique=True,
+        choices=StatsBucket.KIND_CHOICES,
+        help_text="What is counted",
+    )
+    total = models.PositiveBigIntegerField(
+        default=0, help_text="Running total across all clients"
+    )
+
+    class Meta:
+        db_table = "stats_totals"
+        verbose_name = "Statistics Total"
+        verbose_name_plural = "Statistics Totals"
+
+    @staticmethod
+    def _sum(kind):
+        if kind == StatsBucket.LAUNCH:
+            return ClientLaunchStats.get_total_launches()
+        if kind == StatsBucket.DOWNLOAD:
+            return ClientDownloadStats.get_total_downloads()
+        return LoaderLaunchStats.get_total_launches()
+
+    @classmethod
+    def add(cls, kind, count):
+        """
+        Add ``count`` to the running total of ``kind``. The ``apply_*``
+        helpers call this in the transaction that applies the increments; a
+        missing row is seeded from a full aggregate once.
+        """
+        totals = cls.objects.using("statistics")
+        if not totals.filter(kind=kind).update(total=models.F("total") + count):
+            totals.create(kind=kind, total=cls._sum(kind))
+
+    @classmethod
+    def recompute(cls, kinds=None):
+        """
+        Reset the running totals of ``kinds`` (default: all) to a full
+        aggregate of the counter tables, repairing writes that bypassed ``add``
+        such as admin edits.
+        """
+        totals = cls.objects.using("statistics")
+        with transaction.atomic(using="statistics"):
+            for kind in kinds or [kind for kind, label in StatsBucket.KIND_CHOICES]:
+                totals.update_or_create(kind=kind, defaults={"total": cls._sum(kind)})
+
+    @classmethod
+    def get_totals(cls):
+        """Get ``{kind: total}`` for every kind without scanning the counter tables"""
+        totals = dict(cls.objects.using("statistics").values_list("kind", "total"))
+        for kind, label in StatsBucket.KIND_CHOICES:
+            if kind not in totals:
+                totals[kind] = (
+                    cls.objects.using("statistics")
+                    .get_or_create(kind=kind, defaults={"total": cls._sum(kind)})[0]
+                    .total
+                )
+        return totals
+
+
+class IngestedEvent(models.Model):
+    event_id = models.CharField(
+        max_length=64, unique=True, help_text="Client-generated ID of the event"
+    )
+    received_at = models.DateTimeField(
+        auto_now_add=True, help_text="When the event was ingested", db_index=True
+    )
+
+    class Meta:
+        db_table = "ingested_events"
+        verbose_name = "Ingested Event"
+        verbose_name_plural = "Ingested Events"
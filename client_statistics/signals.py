@@ -0,0 +1,33 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from client_statistics.models import (
+    ClientDownloadStats,
+    ClientLaunchStats,
+    LoaderLaunchStats,
+    StatsBucket,
+    StatsTotal,
+)
+
+KINDS = {
+    ClientLaunchStats: StatsBucket.LAUNCH,
+    ClientDownloadStats: StatsBucket.DOWNLOAD,
+    LoaderLaunchStats: StatsBucket.LOADER,
+}
+
+
+@receiver(post_save, sender=ClientLaunchStats)
+@receiver(post_save, sender=ClientDownloadStats)
+@receiver(post_save, sender=LoaderLaunchStats)
+@receiver(post_delete, sender=ClientLaunchStats)
+@receiver(post_delete, sender=ClientDownloadStats)
+@receiver(post_delete, sender=LoaderLaunchStats)
+def counter_changed(sender, **kwargs):
+    """
+    Counters saved or deleted through the ORM (e.g. in the admin) bypass the
+    running totals, so recompute the total of that kind once committed.
+    The UPSERT increments send no signals and keep the totals themselves.
+    """
+    kind = KINDS[sender]
+    transaction.on_commit(lambda: StatsTotal.recompute([kind]), using="statistics")
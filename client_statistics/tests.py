@@ -0,0 +1,70 @@
+from threading import Thread
+
+from django.db import connections
+from django.test import TestCase, TransactionTestCase
+
+from client_statistics.buffer import DOWNLOAD, LAUNCH, LOADER
+from client_statistics.models import (
+    ClientDownloadStats,
+    ClientLaunchStats,
+    LoaderLaunchStats,
+    StatsTotal,
+)
+
+
+class StatsTotalTests(TestCase):
+    databases = {"default", "statistics"}
+
+    def test_apply_paths_keep_totals_in_step(self):
+        ClientLaunchStats.record_launch(1)
+        ClientLaunchStats.apply_increments({1: 2, 2: 3})
+        ClientDownloadStats.record_download(1)
+        LoaderLaunchStats.record_launch()
+        LoaderLaunchStats.apply_increment(4)
+        self.assertEqual(StatsTotal.get_totals(), {LAUNCH: 6, DOWNLOAD: 1, LOADER: 5})
+
+    def test_orm_edits_recompute_the_total(self):
+        LoaderLaunchStats.apply_increment(5)
+        stats = LoaderLaunchStats.objects.get()
+        stats.launches = 42
+        with self.captureOnCommitCallbacks(using="statistics", execute=True):
+            stats.save()
+        self.assertEqual(StatsTotal.get_totals()[LOADER], 42)
+
+        with self.captureOnCommitCallbacks(using="statistics", execute=True):
+            ClientLaunchStats.objects.create(client_id=7, launches=9)
+        self.assertEqual(StatsTotal.get_totals()[LAUNCH], 9)
+
+    def test_recompute_repairs_drift(self):
+        ClientLaunchStats.apply_increments({1: 3})
+        StatsTotal.objects.filter(kind=LAUNCH).update(total=100)
+        StatsTotal.recompute()
+        self.assertEqual(StatsTotal.get_totals()[LAUNCH], 3)
+
+
+class ConcurrentIncrementTests(TransactionTestCase):
+    databases = {"default", "statistics"}
+
+    def test_concurrent_increments_are_not_lost(self):
+        errors = []
+
+        def worker(counts):
+            try:
+                for _ in range(20):
+                    ClientLaunchStats.apply_increments(counts)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connections["statistics"].close()
+
+        batches = [{1: 1}, {1: 2, 2: 1}, {2: 3}, {1: 1, 3: 5}]
+        threads = [Thread(target=worker, args=(counts,)) for counts in batches]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+
+        self.assertEqual(ClientLaunchStats.get_launches_for(), {1: 80, 2: 80, 3: 100})
+        self.assertEqual(StatsTotal.get_totals()[LAUNCH], 260)
@@ -3,7 +3,9 @@ from unfold.admin import ModelAdmin, TabularInline
 
 from client_statistics.models import LoaderLaunchStats
 
-from .models import Client, ChangelogEntry, News, ClientScreenshot
+from .models import Client, ChangelogEntry, News, ClientScreenshot, ScreenshotRendition
+from .processing import enqueue_processing
+from .stamp import content_version
 
 
 class ChangelogEntryInline(TabularInline):
@@ -16,7 +18,8 @@ class ChangelogEntryInline(TabularInline):
 class ClientScreenshotInline(TabularInline):
     model = ClientScreenshot
     extra = 1
-    fields = ["image", "order"]
+    fields = ["image", "order", "processing_status"]
+    readonly_fields = ["processing_status"]
 
 
 @admin.register(Client)
@@ -26,11 +29,20 @@ class ClientAdmin(ModelAdmin):
         "version",
         "working",
         "show",
+        "metadata_status",
         "created_at",
     ]
-    list_filter = ["working", "show", "insecure", "version"]
+    list_filter = ["working", "show", "insecure", "version", "metadata_status"]
     search_fields = ["name", "version"]
     inlines = [ChangelogEntryInline, ClientScreenshotInline]
+    readonly_fields = [
+        "sha256_hash",
+        "size_bytes",
+        "cdn_etag",
+        "metadata_status",
+        "metadata_error",
+        "metadata_updated_at",
+    ]
     fieldsets = (
         (
             "Basic Information",
@@ -40,6 +52,19 @@ class ClientAdmin(ModelAdmin):
             "Configuration",
             {"fields": ("main_class", "insecure", "show", "working", "source_link")},
         ),
+        (
+            "CDN Metadata",
+            {
+                "fields": (
+                    "sha256_hash",
+                    "size_bytes",
+                    "cdn_etag",
+                    "metadata_status",
+                    "metadata_error",
+                    "metadata_updated_at",
+                )
+            },
+        ),
     )
 
 
@@ -71,8 +96,36 @@ class NewsAdmin(ModelAdmin):
     list_filter = ("language",)
 
 
+class ScreenshotRenditionInline(TabularInline):
+    model = ScreenshotRendition
+    extra = 0
+    can_delete = False
+    fields = ["size", "format", "width", "height", "file_size", "file"]
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(ClientScreenshot)
 class ClientScreenshotAdmin(ModelAdmin):
-    list_display = ["client", "order", "created_at"]
-    list_filter = ["client", "created_at"]
+    list_display = ["client", "order", "processing_status", "created_at"]
+    list_filter = ["client", "processing_status", "created_at"]
     search_fields = ["client__name"]
+    readonly_fields = ["processing_status", "processing_error", "processed_at"]
+    inlines = [ScreenshotRenditionInline]
+    actions = ["reprocess"]
+
+    @admin.action(description="Reprocess selected screenshots")
+    def reprocess(self, request, queryset):
+        screenshot_ids = list(queryset.values_list("id", flat=True))
+        queryset.update(
+            processing_status=ClientScreenshot.PROCESSING_PENDING,
+            processing_error="",
+        )
+        content_version.bump()
+        for screenshot_id in screenshot_ids:
+            enqueue_processing(screenshot_id)
+        self.message_user(
+            request, f"Queued {len(screenshot_ids)} screenshots for processing."
+        )
@@ -1,87 +1,188 @@
+import json
 import mimetypes
 import os
+from functools import wraps
 
-from django.http import HttpResponse, JsonResponse
+from django.conf import settings
+from django.db.models import Q
+from django.http import Http404, HttpResponse, HttpResponseNotAllowed
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_GET, require_POST
 
-from client_statistics.models import (
-    ClientDownloadStats,
-    ClientLaunchStats,
-    LoaderLaunchStats,
+from client_statistics.buffer import (
+    DOWNLOAD,
+    LAUNCH,
+    LOADER,
+    counter_buffer,
+    get_totals,
 )
-from clients.models import Client
-from clients.serializers import ClientDetailedSerializer
+from client_statistics.ingest import InvalidBatch, ingest_events, parse_events
+from clients.caching import cached_view, changes, combine, conditional
+from clients.catalog import render_client_list
+from clients.models import ChangelogEntry, Client, ClientScreenshot, News, Tombstone
+from clients.registry import client_registry
+from clients.renderers import JsonResponse
+from clients.renditions import serialize_renditions
+from clients.serializers import (
+    ClientBootstrapSerializer,
+    ClientDetailedSerializer,
+    NewsSerializer,
+)
+from clients.sync import deleted_since, expired, make_cursor, parse_cursor
 
 
-@csrf_exempt
-@require_POST
-def client_launch(request, client_id):
+def async_post(view):
     """
-    API endpoint to record a client launch.
-    Increments the launches counter and returns the updated count.
+    ``csrf_exempt`` + ``require_POST`` for async views;
+    Django 4.2's decorators would turn them back into sync views.
     """
-    client = get_object_or_404(Client, id=client_id)
 
-    launches = ClientLaunchStats.record_launch(client_id)
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != "POST":
+            return HttpResponseNotAllowed(["POST"])
+        return await view(request, *args, **kwargs)
 
-    return JsonResponse({"status": "success", "client_id": client_id, "runs": launches})
+    wrapper.csrf_exempt = True
+    return wrapper
 
 
-@csrf_exempt
-@require_POST
-def client_download(request, client_id):
+def counter_view(kind, respond, doc):
     """
-    API endpoint to record a client download.
-    Increments the downloads counter and returns the updated count.
+    Build a POST view that buffers a ``kind`` increment, for the client in
+    the ``client_id`` URL argument if there is one, and answers with
+    ``respond(count, **kwargs)``.
+
+    Under ASGI (``ASYNC_VIEWS``) the view is native async and only leaves
+    the event loop when the registry or the buffer has to hit the database.
+    Under WSGI it is a plain sync view: an async view there would pay for
+    an ``async_to_sync`` round trip on every request.
     """
-    client = get_object_or_404(Client, id=client_id)
+    if settings.ASYNC_VIEWS:
 
-    downloads = ClientDownloadStats.record_download(client_id)
+        @async_post
+        async def view(request, **kwargs):
+            client_id = kwargs.get("client_id")
+            if client_id is not None and not await client_registry.acontains(client_id):
+                raise Http404("No Client matches the given query.")
+            return respond(await counter_buffer.aincrement(kind, client_id), **kwargs)
 
-    return JsonResponse(
-        {
-            "status": "success",
-            "client_id": client_id,
-            "downloads_count": downloads,
-        }
-    )
+    else:
+
+        @csrf_exempt
+        @require_POST
+        def view(request, **kwargs):
+            client_id = kwargs.get("client_id")
+            if client_id is not None and client_id not in client_registry:
+                raise Http404("No Client matches the given query.")
+            return respond(counter_buffer.increment(kind, client_id), **kwargs)
+
+    view.__doc__ = doc
+    return view
+
+
+client_launch = counter_view(
+    LAUNCH,
+    lambda launches, client_id: JsonResponse(
+        {"status": "success", "client_id": client_id, "runs": launches}
+    ),
+    """
+    API endpoint to record a client launch.
+    Buffers a launch increment and returns the approximate running count.
+    """,
+)
+
+client_download = counter_view(
+    DOWNLOAD,
+    lambda downloads, client_id: JsonResponse(
+        {"status": "success", "client_id": client_id, "downloads_count": downloads}
+    ),
+    """
+    API endpoint to record a client download.
+    Buffers a download increment and returns the approximate running count.
+    """,
+)
+
+loader_launch = counter_view(
+    LOADER,
+    lambda launches: JsonResponse({"status": "success", "runs": launches}),
+    """
+    API endpoint to record a loader launch.
+    Buffers a launch increment and returns the approximate running count.
+    """,
+)
 
 
 @csrf_exempt
 @require_POST
-def loader_launch(request):
+def stats_batch(request):
     """
-    API endpoint to record a loader launch.
-    Increments the launches counter and returns the updated count.
+    API endpoint to record a batch of buffered launch/download events.
+    Accepts a JSON array of {client_id, kind, count, event_id} objects and applies
+    them in one transaction; event ids that were already received are skipped.
     """
-    launches = LoaderLaunchStats.record_launch()
+    try:
+        events = parse_events(json.loads(request.body))
+    except (ValueError, InvalidBatch) as e:
+        return JsonResponse({"error": str(e)}, status=400)
 
-    return JsonResponse({"status": "success", "runs": launches})
+    known = client_registry.clients()
+    valid, rejected = [], []
+    for event in events:
+        event_id, kind, client_id, count = event
+        if client_id is None or client_id in known:
+            valid.append(event)
+        else:
+            rejected.append(event_id)
+    applied = ingest_events(valid)
+
+    return JsonResponse(
+        {
+            "status": "success",
+            "accepted": len(applied),
+            "duplicates": len(valid) - len(applied),
+            "rejected": rejected,
+        }
+    )
 
 
 @csrf_exempt
 @require_GET
+@conditional("statistics")
 def statistics(request):
     """
     API endpoint to get client statistics.
     Returns JSON with total launches and downloads for all clients.
     """
-    total_client_launches = ClientLaunchStats.get_total_launches()
-    total_client_downloads = ClientDownloadStats.get_total_downloads()
-    total_loader_launches = LoaderLaunchStats.get_total_launches()
+    return JsonResponse(statistics_totals())
 
-    return JsonResponse(
-        {
-            "total_loader_launches": total_loader_launches,
-            "total_client_launches": total_client_launches,
-            "total_client_downloads": total_client_downloads,
-        }
+
+def statistics_totals():
+    totals = get_totals()
+    return {
+        "total_loader_launches": totals[LOADER],
+        "total_client_launches": totals[LAUNCH],
+        "total_client_downloads": totals[DOWNLOAD],
+    }
+
+
+def screenshot_changes(request, client_id):
+    return changes(ClientScreenshot.objects.filter(client_id=client_id))
+
+
+def client_detailed_changes(request, client_id):
+    return combine(
+        changes(Client.objects.filter(id=client_id)),
+        changes(ChangelogEntry.objects.filter(client_id=client_id)),
+        changes(ClientScreenshot.objects.filter(client_id=client_id)),
     )
 
 
 @require_GET
+@conditional("client_screenshots", screenshot_changes)
+@cached_view("client_screenshots")
 def client_screenshots(request, client_id):
     """
     API endpoint to get client screenshots.
@@ -89,8 +190,8 @@ def client_screenshots(request, client_id):
     """
     client = get_object_or_404(Client, id=client_id)
 
-    screenshots = client.screenshots.all()
-    if not screenshots.exists():
+    screenshots = list(client.screenshots.prefetch_related("renditions"))
+    if not screenshots:
         return JsonResponse({"error": "No screenshots available"}, status=404)
 
     screenshot_urls = []
@@ -100,6 +201,8 @@ def client_screenshots(request, client_id):
                 "id": screenshot.id,
                 "url": request.build_absolute_uri(screenshot.image.url),
                 "order": screenshot.order,
+                "status": screenshot.processing_status,
+                "renditions": serialize_renditions(screenshot, request),
             }
         )
 
@@ -107,10 +210,110 @@ def client_screenshots(request, client_id):
 
 
 @require_GET
+@conditional("client_detailed", client_detailed_changes)
+@cached_view("client_detailed")
 def client_detailed(request, client_id):
     """
     API endpoint to get detailed client information including changelog and screenshots.
     """
-    client = get_object_or_404(Client, id=client_id)
+    client = get_object_or_404(
+        Client.objects.prefetch_related("changelog_entries", "screenshots__renditions"),
+        id=client_id,
+    )
     serializer = ClientDetailedSerializer(client, context={"request": request})
     return JsonResponse(serializer.data)
+
+
+BOOTSTRAP_SECTIONS = ["clients", "news", "statistics"]
+
+
+def parse_sections(value):
+    """Parse a comma separated ``fields`` parameter into bootstrap sections"""
+    if not value:
+        return BOOTSTRAP_SECTIONS
+    sections = [section.strip() for section in value.split(",") if section.strip()]
+    unknown = set(sections) - set(BOOTSTRAP_SECTIONS)
+    if unknown:
+        raise ValueError(
+            f"Unknown fields: {', '.join(sorted(unknown))} "
+            f"(expected {', '.join(BOOTSTRAP_SECTIONS)})"
+        )
+    return sections
+
+
+def bootstrap_changes(request):
+    news = News.objects.all()
+    language = request.GET.get("language")
+    if language is not None:
+        news = news.filter(language=language)
+    totals = get_totals()
+    return combine(
+        changes(Client.objects.all()),
+        changes(ChangelogEntry.objects.all()),
+        changes(ClientScreenshot.objects.all()),
+        changes(news),
+        (None, "-".join(str(totals[kind]) for kind in (LOADER, LAUNCH, DOWNLOAD))),
+    )
+
+
+@require_GET
+@conditional("bootstrap", bootstrap_changes)
+def bootstrap(request):
+    """
+    API endpoint with everything the loader needs at startup: clients with
+    their changelogs and screenshot renditions, news and statistics.
+    ``?fields=clients,news`` limits the sections, ``?language=`` filters the
+    news and ``?since=`` (the previous ``cursor``) only returns clients and
+    news changed after it, plus the ids deleted since then. Like the change
+    feeds, a missing or expired cursor returns everything with ``reset`` set.
+    """
+    generated_at = timezone.now()
+    try:
+        sections = parse_sections(request.GET.get("fields"))
+        since = parse_cursor(request.GET.get("since"))
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    # Past the tombstone retention a delta could miss deletions
+    reset = since is None or expired(since)
+    data = {
+        "generated_at": generated_at.isoformat(),
+        "cursor": make_cursor(generated_at),
+        "reset": reset,
+    }
+    if reset:
+        since = None
+    else:
+        data["deleted"] = {}
+
+    if "clients" in sections:
+        clients = Client.objects.prefetch_related(
+            "changelog_entries", "screenshots__renditions"
+        )
+        if since is not None:
+            clients = clients.filter(
+                Q(updated_at__gt=since)
+                | Q(changelog_entries__updated_at__gt=since)
+                | Q(screenshots__updated_at__gt=since)
+            ).distinct()
+        data["clients"] = render_client_list(
+            list(clients), ClientBootstrapSerializer, request
+        )
+        if since is not None:
+            data["deleted"]["clients"] = deleted_since(Tombstone.CLIENT, since)
+
+    if "news" in sections:
+        news = News.objects.all()
+        language = request.GET.get("language")
+        if language is not None:
+            news = news.filter(language=language)
+        if since is not None:
+            news = news.filter(updated_at__gt=since)
+        data["news"] = NewsSerializer(news, many=True).data
+        if since is not None:
+            data["deleted"]["news"] = deleted_since(Tombstone.NEWS, since)
+
+    if "statistics" in sections:
+        data["statistics"] = statistics_totals()
+
+    return JsonResponse(data)
@@ -1,5 +1,5 @@
 from django.apps import AppConfig
-from . import heartbeat
+from . import scheduler
 import os
 
 class ClientsConfig(AppConfig):
@@ -7,5 +7,7 @@ class ClientsConfig(AppConfig):
     name = "clients"
 
     def ready(self):
+        from . import signals  # noqa: F401
+
         if os.environ.get("RUN_MAIN") == "true":
-            heartbeat.start()
\ No newline at end of file
+            scheduler.start()
\ No newline at end of file
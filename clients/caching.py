@@ -0,0 +1,259 @@
+import hashlib
+import threading
+import time
+from collections import defaultdict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+    set_response_etag,
+)
+from django.utils.http import http_date
+
+from clients.stamp import content_version
+
+
+def patch_http_cache(response, endpoint):
+    """Set the public Cache-Control configured for ``endpoint`` in HTTP_CACHE_TIMEOUTS"""
+    max_age, stale_while_revalidate = settings.HTTP_CACHE_TIMEOUTS[endpoint]
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=max_age,
+        stale_while_revalidate=stale_while_revalidate,
+    )
+    return response
+
+
+def changes(queryset, field="updated_at", count=True):
+    """
+    Validators for a set of rows: ``(latest timestamp, etag token)``.
+    The row count is part of the token so deletions change it too. Pass
+    ``count=False`` when deletions are tracked otherwise (e.g. tombstones):
+    a lone MAX over an indexed field is a single index lookup, while
+    counting scans every row.
+    """
+    if not count:
+        last = queryset.order_by().aggregate(last=Max(field))["last"]
+        return last, f"{last.timestamp() if last else 0}"
+    result = queryset.order_by().aggregate(last=Max(field), count=Count("pk"))
+    last = result["last"]
+    token = f"{result['count']}-{last.timestamp() if last else 0}"
+    return last, token
+
+
+def combine(*validators):
+    """Merge several ``(timestamp, token)`` validators into one"""
+    timestamps = [last for last, token in validators if last is not None]
+    token = ".".join(token for last, token in validators)
+    return (max(timestamps) if timestamps else None), token
+
+
+def conditional(endpoint, validators=None):
+    """
+    Answer conditional GETs for a view and set its caching headers.
+
+    ``validators(request, *args, **kwargs)`` must return ``(last_modified, token)``
+    without serializing anything, so a matching ``If-None-Match`` or
+    ``If-Modified-Since`` gets a 304 before the view runs. Without
+    ``validators`` the ETag is a hash of the rendered body, which saves
+    bandwidth but not work.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if validators is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                if hasattr(response, "render"):
+                    response.render()
+                set_response_etag(response)
+                response = get_conditional_response(
+                    request, etag=response["ETag"], response=response
+                )
+                return patch_http_cache(response, endpoint)
+
+            last_modified, token = validators(request, *args, **kwargs)
+            etag = f'"{endpoint}-{token}"'
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+
+            response = get_conditional_response(
+                request, etag=etag, last_modified=timestamp
+            )
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response["ETag"] = etag
+            if timestamp is not None:
+                response["Last-Modified"] = http_date(timestamp)
+            return patch_http_cache(response, endpoint)
+
+        return wrapper
+
+    return decorator
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+_metrics = defaultdict(lambda: {"hits": 0, "shared_hits": 0, "misses": 0, "waits": 0})
+
+
+def cache_metrics():
+    """Per-endpoint ``{hits, shared_hits, misses, waits}`` of this process since startup"""
+    with _flights_lock:
+        return {endpoint: dict(values) for endpoint, values in _metrics.items()}
+
+
+def _count(endpoint, name):
+    with _flights_lock:
+        _metrics[endpoint][name] += 1
+
+
+def _shared():
+    return caches["shared"] if "shared" in settings.CACHES else None
+
+
+def _lookup(key, endpoint, timeout):
+    entry = caches["default"].get(key)
+    if entry is not None:
+        _count(endpoint, "hits")
+        return entry
+    shared = _shared()
+    entry = shared.get(key) if shared is not None else None
+    if entry is not None:
+        _count(endpoint, "shared_hits")
+        caches["default"].set(key, entry, timeout)
+    return entry
+
+
+def _store(key, entry, timeout):
+    caches["default"].set(key, entry, timeout)
+    shared = _shared()
+    if shared is not None:
+        shared.set(key, entry, timeout)
+
+
+def _wait_for(key, endpoint, timeout):
+    """
+    Let one worker recompute a missing response while the others wait for
+    it to appear in the shared tier. ``add`` is atomic on Redis and best
+    effort on the file backend. Returns the entry, or ``None`` if this
+    worker should compute it.
+    """
+    shared = _shared()
+    if shared is None or shared.add(f"{key}:lock", 1, settings.CACHE_LOCK_TIMEOUT):
+        return None
+    _count(endpoint, "waits")
+    deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = shared.get(key)
+        if entry is not None:
+            caches["default"].set(key, entry, timeout)
+            return entry
+    return None
+
+
+def _render(request, response):
+    """Render a DRF response inside the view, where DRF hasn't set it up yet"""
+    if hasattr(response, "render") and not response.is_rendered:
+        response.accepted_renderer = request.accepted_renderer
+        response.accepted_media_type = request.accepted_media_type
+        response.renderer_context = {"request": request, "response": response}
+        response.render()
+    return response
+
+
+def _response(entry, status):
+    content, headers = entry
+    response = HttpResponse(content)
+    for header, value in headers.items():
+        response[header] = value
+    response["X-Cache"] = status
+    patch_vary_headers(response, ["Accept"])
+    return response
+
+
+def cached_view(endpoint, timeout=None):
+    """
+    Cache the rendered JSON responses of a read view for ``timeout`` seconds
+    (``CACHE_VIEW_TIMEOUT`` by default), keyed by scheme, host, path, query
+    string and ``Accept`` header. Apply it under ``conditional`` so
+    validators still answer 304s first.
+
+    Entries are dropped as soon as ``content_version`` is bumped by a change
+    to clients, news, changelogs or screenshots. Concurrent misses for the
+    same key are recomputed once per process, and once across workers when
+    a shared tier is configured.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            renderer = getattr(request, "accepted_renderer", None)
+            if request.method not in ("GET", "HEAD") or (
+                renderer is not None and renderer.format != "json"
+            ):
+                return view(request, *args, **kwargs)
+
+            ttl = timeout or settings.CACHE_VIEW_TIMEOUT
+            version = content_version.current()
+            # Responses embed absolute URLs, so the origin is part of the key
+            digest = hashlib.md5(
+                "|".join(
+                    [
+                        request.scheme,
+                        request.get_host(),
+                        request.get_full_path(),
+                        request.META.get("HTTP_ACCEPT", ""),
+                    ]
+                ).encode()
+            ).hexdigest()
+            key = f"view:{endpoint}:{version}:{digest}"
+
+            entry = _lookup(key, endpoint, ttl)
+            if entry is not None:
+                return _response(entry, "HIT")
+
+            with _flights_lock:
+                flight = _flights.setdefault(key, threading.Lock())
+            try:
+                with flight:
+                    entry = _lookup(key, endpoint, ttl) or _wait_for(key, endpoint, ttl)
+                    if entry is not None:
+                        return _response(entry, "HIT")
+
+                    _count(endpoint, "misses")
+                    shared = _shared()
+                    try:
+                        response = _render(request, view(request, *args, **kwargs))
+                        if response.status_code != 200 or response.streaming:
+                            return response
+                        headers = {
+                            header: value
+                            for header, value in response.items()
+                            if header in ("Content-Type", "Allow")
+                        }
+                        entry = (response.content, headers)
+                        _store(key, entry, ttl)
+                    finally:
+                        if shared is not None:
+                            shared.delete(f"{key}:lock")
+                    return _response(entry, "MISS")
+            finally:
+                with _flights_lock:
+                    if _flights.get(key) is flight:
+                        del _flights[key]
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,133 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from client_statistics.models import ClientDownloadStats, ClientLaunchStats
+from clients.models import Client
+from clients.renderers import dumps
+from clients.stamp import client_version
+
+
+def render_client_list(clients, serializer_class=None, request=None):
+    """
+    Serialize clients the same way ``GET /clients/`` does, or with a
+    ``ClientSerializer`` subclass, reading all their counters in two queries.
+    """
+    from clients.serializers import ClientSerializer
+
+    client_ids = [client.id for client in clients]
+    context = {
+        "request": request,
+        "launches": ClientLaunchStats.get_launches_for(client_ids),
+        "downloads": ClientDownloadStats.get_downloads_for(client_ids),
+    }
+    return (serializer_class or ClientSerializer)(
+        clients, many=True, context=context
+    ).data
+
+
+CLIENT_LIST_FIELDS = [
+    "id",
+    "name",
+    "version",
+    "filename",
+    "md5_hash",
+    "size",
+    "main_class",
+    "show",
+    "working",
+    "insecure",
+    "created_at",
+]
+
+
+def client_list(queryset=None):
+    """
+    Build the ``GET /clients/`` items straight from ``values()`` rows and the
+    prefetched counters. Produces exactly what ``render_client_list`` does
+    with ``ClientSerializer``, without its per-field overhead.
+    """
+    if queryset is None:
+        rows = list(Client.objects.values(*CLIENT_LIST_FIELDS))
+        launches = ClientLaunchStats.get_launches_for()
+        downloads = ClientDownloadStats.get_downloads_for()
+    else:
+        rows = list(queryset.values(*CLIENT_LIST_FIELDS))
+        client_ids = [row["id"] for row in rows]
+        launches = ClientLaunchStats.get_launches_for(client_ids)
+        downloads = ClientDownloadStats.get_downloads_for(client_ids)
+
+    # DRF's DateTimeField looks the timezone up again for every value
+    tz = timezone.get_current_timezone() if settings.USE_TZ else None
+    for row in rows:
+        # Keep ClientSerializer's key order: counters go before created_at
+        created_at = row.pop("created_at")
+        if row["insecure"] is not True:
+            del row["insecure"]
+        row["launches"] = launches.get(row["id"], 0)
+        row["downloads"] = downloads.get(row["id"], 0)
+        row["created_at"] = format_datetime(created_at, tz)
+    return rows
+
+
+def format_datetime(value, tz):
+    """``DateTimeField.to_representation`` with the timezone resolved by the caller"""
+    if value is None:
+        return None
+    value = value.astimezone(tz) if tz else value
+    value = value.isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+class CatalogSnapshot:
+    """
+    Pre-rendered JSON body of the client list.
+
+    The snapshot is rebuilt when a ``Client`` is saved or deleted, when
+    ``client_version`` shows a change made through another worker process,
+    and at most every ``CATALOG_MAX_AGE`` seconds so the embedded
+    launch/download counts do not go stale. While one thread rebuilds an
+    expired snapshot, the others keep serving the old one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._version = None
+        self._built_at = 0.0
+
+    def get(self):
+        """Return ``(body, etag)`` for the current snapshot"""
+        expired = (
+            time.monotonic() - self._built_at > settings.CATALOG_MAX_AGE
+            or self._version != client_version.current()
+        )
+        if self._snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._build()
+        elif expired and self._lock.acquire(blocking=False):
+            try:
+                self._build()
+            finally:
+                self._lock.release()
+        return self._snapshot
+
+    def rebuild(self):
+        """Re-render the snapshot immediately"""
+        with self._lock:
+            self._build()
+
+    def _build(self):
+        self._version = client_version.current()
+        body = dumps(client_list())
+        self._snapshot = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+        self._built_at = time.monotonic()
+
+
+catalog = CatalogSnapshot()
@@ -0,0 +1,177 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.utils import timezone
+from django_apscheduler.util import close_old_connections
+
+from . import outbound
+from .scheduler import is_running, scheduler
+
+logger = logging.getLogger(__name__)
+
+FileMetadata = namedtuple("FileMetadata", ["md5", "sha256", "size", "etag"])
+
+
+def cdn_url(filename, base_url=None):
+    """Public CDN URL of a client file"""
+    return f"{(base_url or settings.CDN_BASE_URL).rstrip('/')}/{filename}"
+
+
+def fetch_metadata(url, session=None, etag=None):
+    """
+    Stream a file from the CDN once, computing its MD5, SHA-256 and exact size.
+    With ``etag`` the request is conditional and ``None`` is returned if the
+    file is unchanged. Raises ``requests.RequestException`` if the file can't
+    be downloaded.
+    """
+    md5_hash = hashlib.md5()
+    sha256_hash = hashlib.sha256()
+    size = 0
+    headers = {"If-None-Match": etag} if etag else {}
+
+    with (session or outbound.session()).get(
+        url, headers=headers, timeout=30, stream=True
+    ) as response:
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            md5_hash.update(chunk)
+            sha256_hash.update(chunk)
+            size += len(chunk)
+
+    return FileMetadata(
+        md5_hash.hexdigest(),
+        sha256_hash.hexdigest(),
+        size,
+        response.headers.get("ETag", ""),
+    )
+
+
+def compare_metadata(client, metadata):
+    """
+    Compare the stored ``md5_hash`` and size of a client with a downloaded
+    file and describe every mismatch. Blank values are not compared.
+    """
+    problems = []
+    if client.md5_hash and client.md5_hash.lower() != metadata.md5:
+        problems.append(f"md5 {client.md5_hash} != {metadata.md5}")
+    if client.size_bytes and client.size_bytes != metadata.size:
+        problems.append(f"size {client.size_bytes} != {metadata.size} bytes")
+    elif client.size and client.size != metadata.size // (1024 * 1024):
+        problems.append(f"size {client.size} != {metadata.size // (1024 * 1024)} MB")
+    return problems
+
+
+@close_old_connections
+def resolve_client_metadata(client_id, attempt=0):
+    """
+    Fill in the CDN metadata of a client, retrying with exponential backoff.
+    Only blank ``md5_hash`` / zero ``size`` values are replaced, so manually
+    entered values are kept. The CDN ETag is only stored when those values
+    match the file, so ``verify_cdn`` never skips a mismatched client.
+    """
+    from clients.models import Client
+    from clients.signals import refresh_clients
+
+    client = Client.objects.filter(pk=client_id).first()
+    if client is None:
+        return
+
+    try:
+        metadata = fetch_metadata(cdn_url(client.filename))
+    except requests.RequestException as e:
+        attempt += 1
+        failed = attempt >= settings.CDN_METADATA_MAX_ATTEMPTS
+        logger.warning(
+            f"Error resolving CDN metadata for {client.name} (attempt {attempt}): {e}"
+        )
+        Client.objects.filter(pk=client_id).update(
+            metadata_status=(
+                Client.METADATA_FAILED if failed else Client.METADATA_PENDING
+            ),
+            metadata_error=str(e),
+            metadata_updated_at=timezone.now(),
+        )
+        if not failed:
+            enqueue_metadata(
+                client_id,
+                attempt=attempt,
+                delay=settings.CDN_METADATA_RETRY_DELAY * 2 ** (attempt - 1),
+            )
+        return
+
+    problems = compare_metadata(client, metadata)
+    if problems:
+        logger.warning(
+            f"CDN file of {client.name} does not match its metadata: "
+            f"{'; '.join(problems)}"
+        )
+
+    now = timezone.now()
+    Client.objects.filter(pk=client_id).update(
+        md5_hash=client.md5_hash or metadata.md5,
+        size=client.size or metadata.size // (1024 * 1024),
+        sha256_hash=metadata.sha256,
+        size_bytes=metadata.size,
+        cdn_etag="" if problems else metadata.etag,
+        metadata_status=Client.METADATA_READY,
+        metadata_error="",
+        metadata_updated_at=now,
+        updated_at=now,
+    )
+    refresh_clients()
+
+
+def enqueue_metadata(client_id, attempt=0, delay=0):
+    """
+    Resolve a client's CDN metadata in the background.
+    Runs on the shared scheduler when it is running in this process,
+    otherwise on a one-off daemon thread.
+    """
+    if is_running():
+        scheduler.add_job(
+            resolve_client_metadata,
+            "date",
+            run_date=timezone.now() + timedelta(seconds=delay),
+            args=[client_id, attempt],
+            id=f"resolve_metadata_{client_id}",
+            replace_existing=True,
+        )
+        return
+
+    def run():
+        time.sleep(delay)
+        resolve_client_metadata(client_id, attempt)
+
+    threading.Thread(
+        target=run, name=f"resolve-metadata-{client_id}", daemon=True
+    ).start()
+
+
+@close_old_connections
+def resolve_pending_metadata():
+    """Pick up clients left pending, e.g. by a restart before their job ran"""
+    from clients.models import Client
+
+    pending = Client.objects.filter(metadata_status=Client.METADATA_PENDING)
+    for client_id in pending.values_list("id", flat=True):
+        if scheduler.get_job(f"resolve_metadata_{client_id}") is None:
+            enqueue_metadata(client_id)
+
+
+def start():
+    scheduler.add_job(
+        resolve_pending_metadata,
+        "interval",
+        minutes=10,
+        next_run_time=timezone.now(),
+        id="resolve_pending_metadata",
+        replace_existing=True,
+    )
@@ -1,7 +1,9 @@
 import os
 import requests
 import logging
-from apscheduler.schedulers.background import BackgroundScheduler
+
+from . import outbound
+from .scheduler import scheduler
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +21,7 @@ def send_heartbeat():
         return
 
     try:
-        response = requests.get(heartbeat_url, timeout=10)
+        response = outbound.session().get(heartbeat_url, timeout=10)
 
         response.raise_for_status()
     except requests.RequestException as e:
@@ -27,7 +29,6 @@ def send_heartbeat():
 
 
 def start():
-    scheduler = BackgroundScheduler()
     scheduler.add_job(
         send_heartbeat,
         "interval",
@@ -35,4 +36,3 @@ def start():
         id="send_heartbeat_001",
         replace_existing=True,
     )
-    scheduler.start()
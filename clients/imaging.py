@@ -0,0 +1,52 @@
+"""
+Pillow-only screenshot processing. Nothing here touches Django, so it can run
+in spawned worker processes.
+"""
+
+import io
+
+from PIL import Image
+
+OPTIMIZED_SIZE = (1920, 1080)
+OPTIMIZED_QUALITY = 85
+
+
+def _open(data):
+    image = Image.open(io.BytesIO(data))
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    return image
+
+
+def optimize(image):
+    """Encode the WebP served as the screenshot's main image"""
+    optimized = image.copy()
+    optimized.thumbnail(OPTIMIZED_SIZE, Image.Resampling.LANCZOS)
+    output = io.BytesIO()
+    optimized.save(output, format="WebP", quality=OPTIMIZED_QUALITY, optimize=True)
+    return output.getvalue()
+
+
+def render(image, sizes, formats):
+    """
+    Resize an image to every ``{size: (width, height)}`` box and encode each
+    one in every ``{format: quality}``, returning
+    ``[(size, format, width, height, data)]``. Images are only scaled down.
+    """
+    renditions = []
+    for size, box in sizes.items():
+        resized = image.copy()
+        resized.thumbnail(box, Image.Resampling.LANCZOS)
+        for image_format, quality in formats.items():
+            output = io.BytesIO()
+            resized.save(output, format=image_format.upper(), quality=quality)
+            renditions.append(
+                (size, image_format, resized.width, resized.height, output.getvalue())
+            )
+    return renditions
+
+
+def process(data, sizes, formats):
+    """Return ``(optimized, renditions)`` for the raw bytes of an uploaded image"""
+    image = _open(data)
+    return optimize(image), render(image, sizes, formats)
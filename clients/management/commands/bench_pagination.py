@@ -0,0 +1,112 @@
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client as TestClient
+from django.test import override_settings
+from django.utils import timezone
+
+from clients.models import ChangelogEntry, Client, News, Tombstone
+
+MODELS = [Client, ChangelogEntry, News, Tombstone]
+CONTENT = "<p>" + "Lorem ipsum dolor sit amet. " * 70 + "</p>"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure /news/ response size and latency, full list versus keyset pages, "
+        "as the number of articles grows. Runs on a scratch database with the "
+        "view cache disabled, so every request is rendered."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            nargs="+",
+            default=[1000, 10000, 100000],
+            help="Article counts to measure at (default: 1000 10000 100000).",
+        )
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--full-up-to",
+            type=int,
+            default=10000,
+            help="Skip the unpaginated list above this many rows (default: 10000).",
+        )
+
+    def handle(self, *args, **options):
+        directory = tempfile.mkdtemp(prefix="bench_pagination_")
+        database = connections.settings["default"]
+        connections["default"].close()
+        name, database["NAME"] = database["NAME"], os.path.join(directory, "db.sqlite3")
+        try:
+            with connections["default"].schema_editor() as editor:
+                for model in MODELS:
+                    editor.create_model(model)
+            # bulk_create sends no signals, so cached pages would survive the
+            # inserts; a zero timeout stores nothing and measures rendering.
+            with override_settings(CACHE_VIEW_TIMEOUT=0):
+                self._run(options)
+        finally:
+            connections["default"].close()
+            database["NAME"] = name
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def _run(self, options):
+        client = TestClient()
+        start = timezone.now()
+        inserted = 0
+        for rows in sorted(options["rows"]):
+            News.objects.bulk_create(
+                [
+                    News(
+                        title=f"News {i}",
+                        content=CONTENT,
+                        language="en",
+                        created_at=start - timedelta(seconds=i),
+                    )
+                    for i in range(inserted, rows)
+                ],
+                batch_size=1000,
+            )
+            inserted = rows
+
+            # A deep cursor pointing at the last page
+            last = News.objects.order_by("created_at", "id")[options["limit"]]
+            deep = f"cursor={self._cursor(last)}"
+            variants = [
+                ("first page", f"/news/?limit={options['limit']}"),
+                ("first page, summary", f"/news/?limit={options['limit']}&summary=1"),
+                ("last page", f"/news/?limit={options['limit']}&{deep}"),
+            ]
+            if rows <= options["full_up_to"]:
+                variants.insert(0, ("full list", "/news/"))
+
+            for name, url in variants:
+                size, latency = self._measure(client, url, options["repeat"])
+                self.stdout.write(
+                    f"{rows:>7} rows  {name:<20} {size / 1024:>10.1f} KB "
+                    f"{latency:>9.2f} ms"
+                )
+
+    @staticmethod
+    def _cursor(row):
+        from clients.pagination import KeysetPagination
+
+        return KeysetPagination.encode_cursor(row)
+
+    @staticmethod
+    def _measure(client, url, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client.get(url, HTTP_ACCEPT="application/json")
+            timings.append((time.perf_counter() - started) * 1000)
+        return len(response.content), statistics.median(timings)
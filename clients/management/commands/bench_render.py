@@ -0,0 +1,122 @@
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from rest_framework.renderers import JSONRenderer
+
+from client_statistics.models import ClientDownloadStats, ClientLaunchStats
+from clients.catalog import client_list, render_client_list
+from clients.models import Client
+from clients.renderers import dumps, orjson
+
+MODELS = {
+    "default": [Client],
+    "statistics": [ClientLaunchStats, ClientDownloadStats],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure how long the /clients/ list takes to serialize, with "
+        "ClientSerializer and the lean values() path, and to encode with the "
+        "stdlib and the fast JSON encoder. Fails if the two serializations "
+        "differ. Runs on scratch databases."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--clients",
+            type=int,
+            nargs="+",
+            default=[10, 1000, 10000],
+            help="Client counts to measure at (default: 10 1000 10000).",
+        )
+        parser.add_argument("--repeat", type=int, default=10)
+
+    def handle(self, *args, **options):
+        directory = tempfile.mkdtemp(prefix="bench_render_")
+        names = {}
+        try:
+            for alias, models in MODELS.items():
+                database = connections.settings[alias]
+                connections[alias].close()
+                names[alias] = database["NAME"]
+                database["NAME"] = os.path.join(directory, f"{alias}.sqlite3")
+                with connections[alias].schema_editor() as editor:
+                    for model in models:
+                        editor.create_model(model)
+            self._run(options)
+        finally:
+            for alias, name in names.items():
+                connections[alias].close()
+                connections.settings[alias]["NAME"] = name
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def _run(self, options):
+        self.stdout.write(f"fast encoder: {'orjson' if orjson else 'stdlib fallback'}")
+        stdlib = JSONRenderer()
+        inserted = 0
+        for count in sorted(options["clients"]):
+            clients = Client.objects.bulk_create(
+                [
+                    Client(
+                        name=f"Client {i}",
+                        filename=f"Client{i}.jar",
+                        size=42,
+                        insecure=i % 3 == 0,
+                        show=i % 5 != 0,
+                    )
+                    for i in range(inserted, count)
+                ],
+                batch_size=1000,
+            )
+            # Leave some clients without counters
+            ClientLaunchStats.objects.using("statistics").bulk_create(
+                [ClientLaunchStats(client_id=c.id, launches=c.id) for c in clients],
+                batch_size=1000,
+            )
+            ClientDownloadStats.objects.using("statistics").bulk_create(
+                [
+                    ClientDownloadStats(client_id=c.id, downloads=c.id * 2)
+                    for c in clients
+                    if c.id % 2
+                ],
+                batch_size=1000,
+            )
+            inserted = count
+
+            data = render_client_list(list(Client.objects.all()))
+            if dumps(client_list()) != dumps(data):
+                raise CommandError(
+                    f"{count} clients: client_list() differs from ClientSerializer"
+                )
+            if dumps(data) != stdlib.render(data):
+                raise CommandError(
+                    f"{count} clients: encoders produced different bytes"
+                )
+
+            serializer = self._time(
+                lambda: render_client_list(list(Client.objects.all())),
+                options["repeat"],
+            )
+            lean = self._time(client_list, options["repeat"])
+            slow = self._time(lambda: stdlib.render(data), options["repeat"])
+            fast = self._time(lambda: dumps(data), options["repeat"])
+            self.stdout.write(
+                f"{count:>6} clients  {len(dumps(data)) / 1024:>9.1f} KB  "
+                f"serializer {serializer:>8.2f} ms  values() {lean:>7.2f} ms  "
+                f"stdlib json {slow:>7.2f} ms  fast json {fast:>7.2f} ms"
+            )
+
+    @staticmethod
+    def _time(function, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            function()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
@@ -0,0 +1,42 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from whitenoise.compress import Compressor
+
+from CollapseAPI.media import ENCODINGS
+
+
+class Command(BaseCommand):
+    help = (
+        "Write .br/.gz variants next to compressible media files, "
+        "for the in-process media server to send instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Recompress files that already have variants.",
+        )
+
+    def handle(self, *args, **options):
+        compressor = Compressor(
+            extensions=(*Compressor.SKIP_COMPRESS_EXTENSIONS, "avif"), quiet=True
+        )
+        suffixes = tuple(suffix for _, suffix in ENCODINGS)
+        scanned = written = 0
+        for directory, _, files in os.walk(settings.MEDIA_ROOT):
+            for name in files:
+                path = os.path.join(directory, name)
+                if name.endswith(suffixes) or not compressor.should_compress(name):
+                    continue
+                scanned += 1
+                if not options["force"] and any(
+                    os.path.exists(path + suffix) for suffix in suffixes
+                ):
+                    continue
+                written += len(compressor.compress(path))
+        self.stdout.write(
+            f"{scanned} compressible files, {written} compressed variants written"
+        )
@@ -0,0 +1,77 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from CollapseAPI.media import ENCODINGS
+from clients.models import ClientScreenshot, ScreenshotRendition
+from clients.storage import content_addressed_storage
+
+# Directories holding screenshot files: content-addressed blobs, and the
+# per-client files written before screenshots were content-addressed.
+ROOTS = [content_addressed_storage.prefix, "client_screenshots"]
+
+
+class Command(BaseCommand):
+    help = "Delete screenshot and rendition files that no row references anymore."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace",
+            type=int,
+            default=60,
+            help="Keep unreferenced files younger than this many minutes, "
+            "as a running job may not have saved its rows yet (default: 60).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report what would be deleted.",
+        )
+
+    def handle(self, *args, **options):
+        storage = content_addressed_storage
+        referenced = set()
+        for field in ("image", "original"):
+            referenced.update(ClientScreenshot.objects.values_list(field, flat=True))
+        referenced.update(ScreenshotRendition.objects.values_list("file", flat=True))
+
+        cutoff = timezone.now() - timedelta(minutes=options["grace"])
+        scanned = deleted = freed = 0
+        for name in self._walk(storage, ROOTS):
+            scanned += 1
+            if (
+                self._source(name) in referenced
+                or storage.get_modified_time(name) > cutoff
+            ):
+                continue
+            deleted += 1
+            freed += storage.size(name)
+            if options["dry_run"]:
+                self.stdout.write(f"Would delete {name}")
+            else:
+                storage.delete(name)
+
+        action = "would be deleted" if options["dry_run"] else "deleted"
+        self.stdout.write(
+            f"{scanned} files scanned, {deleted} unreferenced {action} "
+            f"({freed / (1024 * 1024):.1f} MB)"
+        )
+
+    @staticmethod
+    def _source(name):
+        """The file a precompressed variant belongs to, or the name itself"""
+        for _, suffix in ENCODINGS:
+            if name.endswith(suffix):
+                return name[: -len(suffix)]
+        return name
+
+    @staticmethod
+    def _walk(storage, roots):
+        pending = [root for root in roots if storage.exists(root)]
+        while pending:
+            directory = pending.pop()
+            directories, files = storage.listdir(directory)
+            pending.extend(f"{directory}/{name}" for name in directories)
+            for name in files:
+                yield f"{directory}/{name}"
@@ -0,0 +1,82 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Send concurrent requests to a running server and report req/s and latency percentiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "url", nargs="+", help="URL(s) to request, used round-robin."
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=2000,
+            help="Total number of requests (default: 2000).",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=32,
+            help="Concurrent connections (default: 32).",
+        )
+        parser.add_argument(
+            "--method", default="GET", help="HTTP method to use (default: GET)."
+        )
+        parser.add_argument(
+            "--header",
+            action="append",
+            default=[],
+            help='Extra request header as "Name: value"; can be repeated.',
+        )
+
+    def handle(self, *args, **options):
+        urls = options["url"]
+        total = options["requests"]
+        concurrency = options["concurrency"]
+        headers = dict(
+            (part.strip() for part in header.split(":", 1))
+            for header in options["header"]
+        )
+        per_worker = [
+            total // concurrency + (i < total % concurrency) for i in range(concurrency)
+        ]
+
+        def worker(index, count):
+            session = requests.Session()
+            session.headers.update(headers)
+            latencies, errors = [], 0
+            for i in range(count):
+                url = urls[(index + i * concurrency) % len(urls)]
+                started = time.perf_counter()
+                try:
+                    response = session.request(options["method"], url, timeout=30)
+                    errors += response.status_code >= 400
+                except requests.RequestException:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+            return latencies, errors
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(worker, range(concurrency), per_worker))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for result in results for latency in result[0])
+        errors = sum(result[1] for result in results)
+        if not latencies:
+            raise CommandError("No requests were sent")
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+        self.stdout.write(
+            f"{len(latencies)} requests, concurrency {concurrency}, {errors} errors\n"
+            f"{len(latencies) / elapsed:.1f} req/s, "
+            f"p50 {percentile(0.50):.1f} ms, p90 {percentile(0.90):.1f} ms, "
+            f"p99 {percentile(0.99):.1f} ms, max {latencies[-1] * 1000:.1f} ms"
+        )
@@ -0,0 +1,90 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from clients.models import ClientScreenshot
+from clients.processing import build_executor, mark_failed, submit
+from clients.renditions import store_results
+
+
+class Command(BaseCommand):
+    help = "Re-optimize screenshots and regenerate their renditions on a process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Number of worker processes (default: SCREENSHOT_PROCESS_WORKERS).",
+        )
+        parser.add_argument(
+            "--client",
+            type=int,
+            help="Only reprocess the screenshots of this client id.",
+        )
+        parser.add_argument(
+            "--status",
+            choices=[
+                choice for choice, _ in ClientScreenshot.PROCESSING_STATUS_CHOICES
+            ],
+            help="Only reprocess screenshots in this processing state.",
+        )
+
+    def handle(self, *args, **options):
+        screenshots = ClientScreenshot.objects.select_related("client").exclude(
+            image=""
+        )
+        if options["client"]:
+            screenshots = screenshots.filter(client_id=options["client"])
+        if options["status"]:
+            screenshots = screenshots.filter(processing_status=options["status"])
+        screenshots = list(screenshots)
+
+        started = time.monotonic()
+        processed = 0
+        failed = []
+
+        workers = options["workers"] or settings.SCREENSHOT_PROCESS_WORKERS
+        with build_executor(workers) as pool:
+            # Keep a couple of images queued per worker without reading
+            # every original into memory up front.
+            limit = workers * 2
+            pending = {}
+            queue = iter(screenshots)
+            while True:
+                for screenshot in queue:
+                    try:
+                        pending[submit(pool, screenshot)] = screenshot
+                    except Exception as e:
+                        failed.append(screenshot)
+                        mark_failed(screenshot, e)
+                        self.stderr.write(
+                            f"{screenshot.client.name} #{screenshot.pk}: {e}"
+                        )
+                    if len(pending) >= limit:
+                        break
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    screenshot = pending.pop(future)
+                    try:
+                        store_results(screenshot, *future.result())
+                        processed += 1
+                    except Exception as e:
+                        failed.append(screenshot)
+                        mark_failed(screenshot, e)
+                        self.stderr.write(
+                            f"{screenshot.client.name} #{screenshot.pk}: {e}"
+                        )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f"{len(screenshots)} screenshots: {processed} processed, "
+            f"{len(failed)} failed in {elapsed:.2f}s"
+        )
+        if failed:
+            raise CommandError(f"{len(failed)} screenshots failed to process")
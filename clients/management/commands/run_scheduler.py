@@ -0,0 +1,24 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from clients import processing, scheduler
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the background jobs (CDN metadata, screenshot processing, stats "
+        "rollups, SQLite maintenance) in this process until it is terminated."
+    )
+
+    def handle(self, *args, **options):
+        stopped = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stopped.set())
+
+        scheduler.start()
+        self.stdout.write("Scheduler started")
+        stopped.wait()
+        scheduler.scheduler.shutdown()
+        processing.shutdown()
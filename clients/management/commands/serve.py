@@ -0,0 +1,12 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Run the production server (gunicorn configured by gunicorn.conf.py)."
+
+    def handle(self, *args, **options):
+        config = os.path.join(settings.BASE_DIR, "gunicorn.conf.py")
+        os.execvp("gunicorn", ["gunicorn", "--config", config])
@@ -0,0 +1,98 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from clients import outbound
+from clients.cdn import cdn_url, compare_metadata, fetch_metadata
+from clients.models import Client
+
+
+class Command(BaseCommand):
+    help = "Re-verify the md5_hash and size of every client against the files served by the CDN."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=8,
+            help="Number of files streamed concurrently (default: 8).",
+        )
+        parser.add_argument(
+            "--cdn-url",
+            help="Base URL to verify against instead of CDN_BASE_URL.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Download every file even if its stored ETag still matches.",
+        )
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        session = outbound.build_session(pool_size=workers)
+
+        clients = list(Client.objects.exclude(filename=""))
+        started = time.monotonic()
+        total_bytes = 0
+        unchanged = verified = 0
+        mismatches = []
+        errors = []
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(
+                    fetch_metadata,
+                    cdn_url(client.filename, options["cdn_url"]),
+                    session,
+                    None if options["force"] else client.cdn_etag,
+                ): client
+                for client in clients
+            }
+            for future in as_completed(futures):
+                client = futures[future]
+                try:
+                    metadata = future.result()
+                except requests.RequestException as e:
+                    errors.append(client)
+                    self.stderr.write(f"{client.name}: {e}")
+                    continue
+
+                if metadata is None:
+                    unchanged += 1
+                    continue
+
+                total_bytes += metadata.size
+                problems = compare_metadata(client, metadata)
+                if problems:
+                    mismatches.append(client)
+                    self.stdout.write(
+                        self.style.ERROR(f"{client.name}: {'; '.join(problems)}")
+                    )
+                    continue
+
+                verified += 1
+                Client.objects.filter(pk=client.pk).update(
+                    sha256_hash=metadata.sha256,
+                    size_bytes=metadata.size,
+                    cdn_etag=metadata.etag,
+                )
+
+        elapsed = time.monotonic() - started
+        throughput = total_bytes / (1024 * 1024) / elapsed if elapsed else 0
+        self.stdout.write(
+            f"{len(clients)} clients: {verified} verified, {unchanged} unchanged, "
+            f"{len(mismatches)} mismatched, {len(errors)} failed; "
+            f"{total_bytes / (1024 * 1024):.1f} MB in {elapsed:.2f}s ({throughput:.1f} MB/s)"
+        )
+        for host, metrics in outbound.metrics().items():
+            self.stdout.write(
+                f"{host}: {metrics['requests']} requests, {metrics['errors']} errors, "
+                f"{metrics['avg_time'] * 1000:.0f} ms avg, "
+                f"{metrics['max_time'] * 1000:.0f} ms max"
+            )
+        if mismatches or errors:
+            raise CommandError(
+                f"{len(mismatches)} mismatched and {len(errors)} unreachable client files"
+            )
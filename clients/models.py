@@ -1,12 +1,9 @@
-import hashlib
-import io
 import os
 
-import requests
-from django.core.files.base import ContentFile
-from django.db import models
+from django.db import models, transaction
 from django.utils.safestring import mark_safe
-from PIL import Image
+
+from clients.storage import content_addressed_storage
 
 
 def client_screenshot_path(instance, filename):
@@ -14,6 +11,11 @@ def client_screenshot_path(instance, filename):
     return f"client_screenshots/{instance.client.id}/{filename}"
 
 
+def screenshot_rendition_path(instance, filename):
+    """Generate path for screenshot renditions"""
+    return f"client_screenshots/{instance.screenshot.client_id}/renditions/{filename}"
+
+
 class ClientScreenshot(models.Model):
     id = models.AutoField(primary_key=True, help_text="Unique identifier for the screenshot.")
     client = models.ForeignKey(
@@ -24,13 +26,44 @@ class ClientScreenshot(models.Model):
     )
     image = models.ImageField(
         upload_to=client_screenshot_path,
+        storage=content_addressed_storage,
         help_text="Client screenshot (will be optimized to WebP format).",
     )
+    original = models.ImageField(
+        upload_to=client_screenshot_path,
+        storage=content_addressed_storage,
+        blank=True,
+        editable=False,
+        help_text="The screenshot as uploaded, kept to render the optimized copies from.",
+    )
     order = models.PositiveIntegerField(
         default=0,
         help_text="Order of the screenshot (lower numbers appear first).",
     )
+
+    PROCESSING_PENDING = "pending"
+    PROCESSING_READY = "ready"
+    PROCESSING_FAILED = "failed"
+    PROCESSING_STATUS_CHOICES = [
+        (PROCESSING_PENDING, "Pending"),
+        (PROCESSING_READY, "Ready"),
+        (PROCESSING_FAILED, "Failed"),
+    ]
+
+    processing_status = models.CharField(
+        max_length=10,
+        choices=PROCESSING_STATUS_CHOICES,
+        default=PROCESSING_READY,
+        help_text="State of the background image optimization. Until it is ready the raw upload is served.",
+    )
+    processing_error = models.TextField(
+        blank=True, help_text="Last error raised while processing the image."
+    )
+    processed_at = models.DateTimeField(
+        null=True, blank=True, help_text="When the image was last processed."
+    )
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["order", "created_at"]
@@ -38,29 +71,68 @@ class ClientScreenshot(models.Model):
         verbose_name_plural = "Client Screenshots"
 
     def save(self, *args, **kwargs):
-        if self.image and hasattr(self.image, "file"):
-            self._optimize_screenshot()
+        uploaded = bool(self.image) and not self.image._committed
+        if uploaded:
+            self.original.save(self.image.name, self.image.file, save=False)
+            self.image = self.original.name
+            self.processing_status = self.PROCESSING_PENDING
+            self.processing_error = ""
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {
+                    *update_fields,
+                    "original",
+                    "processing_status",
+                    "processing_error",
+                }
+
         super().save(*args, **kwargs)
 
-    def _optimize_screenshot(self):
-        """Optimize screenshot to WebP format"""
-        try:
-            image = Image.open(self.image.file)
+        if uploaded:
+            from clients.processing import enqueue_processing
+
+            transaction.on_commit(lambda: enqueue_processing(self.pk))
+
 
-            if image.mode in ("RGBA", "LA", "P"):
-                image = image.convert("RGB")
+class ScreenshotRendition(models.Model):
+    THUMB = "thumb"
+    MEDIUM = "medium"
+    FULL = "full"
+    SIZE_CHOICES = [
+        (THUMB, "Thumbnail"),
+        (MEDIUM, "Medium"),
+        (FULL, "Full"),
+    ]
 
-            max_size = (1920, 1080)
-            image.thumbnail(max_size, Image.Resampling.LANCZOS)
+    screenshot = models.ForeignKey(
+        ClientScreenshot,
+        on_delete=models.CASCADE,
+        related_name="renditions",
+        help_text="The screenshot this rendition was generated from.",
+    )
+    size = models.CharField(
+        max_length=10, choices=SIZE_CHOICES, help_text="Size preset of the rendition."
+    )
+    format = models.CharField(
+        max_length=10, help_text="Image format of the rendition (e.g. webp, avif)."
+    )
+    file = models.FileField(
+        upload_to=screenshot_rendition_path, storage=content_addressed_storage
+    )
+    width = models.PositiveIntegerField(help_text="Width of the rendition in pixels.")
+    height = models.PositiveIntegerField(help_text="Height of the rendition in pixels.")
+    file_size = models.PositiveIntegerField(
+        help_text="Size of the rendition file in bytes."
+    )
 
-            output = io.BytesIO()
-            image.save(output, format="WebP", quality=85, optimize=True)
-            output.seek(0)
+    class Meta:
+        ordering = ["screenshot", "width", "format"]
+        unique_together = ["screenshot", "size", "format"]
+        verbose_name = "Screenshot Rendition"
+        verbose_name_plural = "Screenshot Renditions"
 
-            filename = f"{self.client.name}_screenshot_{self.id}.webp"
-            self.image.save(filename, ContentFile(output.getvalue()), save=False)
-        except Exception as e:
-            print(f"Error optimizing screenshot for {self.client.name}: {e}")
+    def __str__(self):
+        return f"{self.screenshot_id} {self.size} ({self.format}, {self.width}x{self.height})"
 
 
 class Client(models.Model):
@@ -88,44 +160,78 @@ class Client(models.Model):
         help_text="Size of the client file in MB (auto-calculated from CDN, you can also set it manually).",
         default=0,
     )
+    sha256_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="SHA-256 hash of the client file (auto-calculated from CDN).",
+    )
+    size_bytes = models.BigIntegerField(
+        default=0,
+        help_text="Exact size of the client file in bytes (auto-calculated from CDN).",
+    )
+    cdn_etag = models.CharField(
+        max_length=200,
+        blank=True,
+        help_text="ETag the CDN served with the last verified copy of the file.",
+    )
+
+    METADATA_PENDING = "pending"
+    METADATA_READY = "ready"
+    METADATA_FAILED = "failed"
+    METADATA_STATUS_CHOICES = [
+        (METADATA_PENDING, "Pending"),
+        (METADATA_READY, "Ready"),
+        (METADATA_FAILED, "Failed"),
+    ]
+
+    metadata_status = models.CharField(
+        max_length=10,
+        choices=METADATA_STATUS_CHOICES,
+        default=METADATA_READY,
+        help_text="State of the background CDN metadata resolution.",
+    )
+    metadata_error = models.TextField(
+        blank=True, help_text="Last error raised while resolving CDN metadata."
+    )
+    metadata_updated_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the CDN metadata was last resolved or attempted.",
+    )
 
     def save(self, *args, **kwargs):
         if not self.filename:
             self.filename = self.name + ".jar"
 
-        if self.filename and not self.md5_hash:
-            self._calculate_md5_from_cdn()
-
-        if self.size == 0:
-            file_size_bytes = int(self._get_file_size())
-            self.size = file_size_bytes // (1024 * 1024)
+        update_fields = kwargs.get("update_fields")
+        if self.cdn_etag and self.pk and self._file_changed():
+            # The ETag vouches for the old values; verify_cdn must re-download
+            self.cdn_etag = ""
+            if update_fields is not None:
+                kwargs["update_fields"] = update_fields = {*update_fields, "cdn_etag"}
+
+        needs_metadata = bool(self.filename) and (
+            not self.md5_hash or (self.size == 0 and self.size_bytes == 0)
+        )
+        if needs_metadata:
+            self.metadata_status = self.METADATA_PENDING
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "metadata_status"}
 
         super().save(*args, **kwargs)
 
-    def _get_file_size(self):
-        """Get the file size of the client file from CDN"""
-        try:
-            cdn_url = f"https://cdn.collapseloader.org/{self.filename}"
-            response = requests.head(cdn_url, timeout=30)
-            if response.status_code == 200:
-                return response.headers.get("Content-Length", "0")
-        except Exception as e:
-            print(f"Error getting file size for {self.name}: {e}")
-        return "0"
-
-    def _calculate_md5_from_cdn(self):
-        """Calculate MD5 hash from CDN file"""
-        try:
-            cdn_url = f"https://cdn.collapseloader.org/{self.filename}"
-            response = requests.get(cdn_url, timeout=30, stream=True)
-            if response.status_code == 200:
-                md5_hash = hashlib.md5()
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        md5_hash.update(chunk)
-                self.md5_hash = md5_hash.hexdigest()
-        except Exception as e:
-            print(f"Error calculating MD5 for {self.name}: {e}")
+        if needs_metadata:
+            from clients.cdn import enqueue_metadata
+
+            transaction.on_commit(lambda: enqueue_metadata(self.pk))
+
+    def _file_changed(self):
+        """Whether the filename, hash or size differ from the stored row"""
+        fields = ["filename", "md5_hash", "size", "size_bytes"]
+        stored = Client.objects.filter(pk=self.pk).values(*fields).first()
+        return stored is not None and any(
+            stored[field] != getattr(self, field) for field in fields
+        )
 
     def get_screenshot_urls(self):
         """Get URLs for all client screenshots"""
@@ -217,6 +323,7 @@ class ChangelogEntry(models.Model):
         verbose_name = "Changelog Entry"
         verbose_name_plural = "Changelog Entries"
         unique_together = ["client", "version"]
+        indexes = [models.Index(fields=["client", "-created_at", "-id"])]
 
     def __str__(self):
         return f"{self.client.name} - {self.version}"
@@ -247,3 +354,32 @@ class News(models.Model):
         ordering = ["-created_at"]
         verbose_name = "News Article"
         verbose_name_plural = "News Articles"
+        indexes = [
+            models.Index(fields=["-created_at", "-id"]),
+            models.Index(fields=["language", "-created_at", "-id"]),
+            # ETag validators and ?since= feeds read updated_at
+            models.Index(fields=["updated_at"]),
+            models.Index(fields=["language", "updated_at"]),
+        ]
+
+
+class Tombstone(models.Model):
+    """Record of a deleted row, so change feeds can report the deletion"""
+
+    CLIENT = "client"
+    NEWS = "news"
+    KIND_CHOICES = [
+        (CLIENT, "Client"),
+        (NEWS, "News"),
+    ]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-deleted_at"]
+        indexes = [models.Index(fields=["kind", "deleted_at"])]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id} deleted at {self.deleted_at}"
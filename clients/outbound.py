@@ -0,0 +1,80 @@
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_lock = threading.Lock()
+_session = None
+_metrics = {}
+
+
+def _retry():
+    return Retry(
+        total=settings.HTTP_RETRIES,
+        backoff_factor=settings.HTTP_RETRY_BACKOFF,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        raise_on_status=False,
+    )
+
+
+def _record_timing(response, *args, **kwargs):
+    """Response hook collecting per-host request counts and latencies"""
+    host = urlsplit(response.url).netloc
+    elapsed = response.elapsed.total_seconds()
+    with _lock:
+        metrics = _metrics.setdefault(
+            host, {"requests": 0, "errors": 0, "total_time": 0.0, "max_time": 0.0}
+        )
+        metrics["requests"] += 1
+        metrics["errors"] += response.status_code >= 400
+        metrics["total_time"] += elapsed
+        metrics["max_time"] = max(metrics["max_time"], elapsed)
+
+
+def build_session(pool_size=None):
+    """
+    Create a ``requests.Session`` with keep-alive connection pools and retries.
+    Hosts listed in ``HTTP_HOST_POOL_SIZES`` get their own pool size.
+    """
+    session = requests.Session()
+
+    adapter = HTTPAdapter(
+        pool_maxsize=pool_size or settings.HTTP_POOL_SIZE, max_retries=_retry()
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    for host, host_pool_size in settings.HTTP_HOST_POOL_SIZES.items():
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=max(host_pool_size, pool_size or 0),
+            max_retries=_retry(),
+        )
+        session.mount(f"http://{host}/", adapter)
+        session.mount(f"https://{host}/", adapter)
+
+    session.hooks["response"].append(_record_timing)
+    return session
+
+
+def session():
+    """The process-wide outbound session shared by all call sites"""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+def metrics():
+    """Per-host ``{requests, errors, total_time, max_time, avg_time}`` since startup"""
+    with _lock:
+        return {
+            host: {**values, "avg_time": values["total_time"] / values["requests"]}
+            for host, values in _metrics.items()
+        }
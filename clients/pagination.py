@@ -0,0 +1,76 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination on ``(created_at, id)``, newest first.
+
+    Only used when the request passes ``?limit=`` or ``?cursor=``, so
+    existing callers keep getting the plain list. Every page is an index
+    range scan starting after the last row of the previous one, so deep
+    pages cost the same as the first, unlike offset pagination.
+    """
+
+    default_limit = 20
+    max_limit = 100
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if "limit" not in params and "cursor" not in params:
+            return None
+
+        self.request = request
+        try:
+            limit = int(params.get("limit", self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = max(1, min(limit, self.max_limit))
+
+        queryset = queryset.order_by("-created_at", "-id")
+        position = self.decode_cursor(params.get("cursor"))
+        if position is not None:
+            created_at, pk = position
+            # The redundant created_at <= bound lets SQLite seek the index
+            # instead of filtering every row of the OR.
+            queryset = queryset.filter(
+                Q(created_at__lte=created_at),
+                Q(created_at__lt=created_at) | Q(id__lt=pk),
+            )
+
+        rows = list(queryset[: limit + 1])
+        self.next_position = rows[limit - 1] if len(rows) > limit else None
+        return rows[:limit]
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            "cursor",
+            self.encode_cursor(self.next_position),
+        )
+
+    @staticmethod
+    def encode_cursor(row):
+        position = f"{row.created_at.isoformat()}|{row.pk}"
+        return base64.urlsafe_b64encode(position.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None
+        try:
+            created_at, pk = base64.urlsafe_b64decode(cursor).decode().split("|")
+            return datetime.fromisoformat(created_at), int(pk)
+        except (ValueError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
@@ -0,0 +1,153 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django_apscheduler.util import close_old_connections
+
+from . import imaging
+from .scheduler import is_running, scheduler
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def build_executor(max_workers=None):
+    """
+    Process pool for Pillow work. Workers are spawned rather than forked so
+    they don't inherit the server's threads, database connections or locks.
+    """
+    return ProcessPoolExecutor(
+        max_workers=max_workers or settings.SCREENSHOT_PROCESS_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def executor():
+    """The process pool shared by this process, created on first use"""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = build_executor()
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def shutdown():
+    """
+    Shut down this process's pool, e.g. when a server worker exits.
+    Queued work is dropped; process_pending_screenshots picks it up later.
+    """
+    global _executor, _executor_pid
+    with _executor_lock:
+        pool = _executor if _executor_pid == os.getpid() else None
+        _executor = _executor_pid = None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+
+def submit(pool, screenshot):
+    """Start processing ``screenshot`` on ``pool`` and return the future"""
+    from .renditions import read_source, rendition_formats
+
+    return pool.submit(
+        imaging.process,
+        read_source(screenshot),
+        settings.SCREENSHOT_RENDITION_SIZES,
+        rendition_formats(),
+    )
+
+
+def mark_failed(screenshot, error):
+    from .models import ClientScreenshot
+    from .stamp import content_version
+
+    logger.warning(f"Error processing screenshot {screenshot.pk}: {error}")
+    ClientScreenshot.objects.filter(pk=screenshot.pk).update(
+        processing_status=ClientScreenshot.PROCESSING_FAILED,
+        processing_error=str(error),
+        processed_at=timezone.now(),
+    )
+    content_version.bump()
+
+
+@close_old_connections
+def process_screenshot(screenshot_id):
+    """
+    Optimize a screenshot and render its renditions on the process pool.
+    The calling thread only waits for the result and writes it back.
+    """
+    from .models import ClientScreenshot
+    from .renditions import store_results
+
+    screenshot = (
+        ClientScreenshot.objects.select_related("client")
+        .filter(pk=screenshot_id)
+        .first()
+    )
+    if screenshot is None:
+        return
+
+    try:
+        optimized, renditions = submit(executor(), screenshot).result()
+        store_results(screenshot, optimized, renditions)
+    except Exception as e:
+        mark_failed(screenshot, e)
+
+
+def enqueue_processing(screenshot_id):
+    """
+    Process a screenshot in the background.
+    Runs on the shared scheduler when it is running in this process,
+    otherwise on a one-off daemon thread.
+    """
+    if is_running():
+        scheduler.add_job(
+            process_screenshot,
+            args=[screenshot_id],
+            id=f"process_screenshot_{screenshot_id}",
+            replace_existing=True,
+        )
+        return
+
+    threading.Thread(
+        target=process_screenshot,
+        args=[screenshot_id],
+        name=f"process-screenshot-{screenshot_id}",
+        daemon=True,
+    ).start()
+
+
+@close_old_connections
+def process_pending_screenshots():
+    """
+    Pick up screenshots left pending, e.g. by a restart before their job ran.
+    Recent uploads are skipped as their job may still be running.
+    """
+    from .models import ClientScreenshot
+
+    pending = ClientScreenshot.objects.filter(
+        processing_status=ClientScreenshot.PROCESSING_PENDING,
+        updated_at__lt=timezone.now() - timedelta(minutes=10),
+    )
+    for screenshot_id in pending.values_list("id", flat=True):
+        if scheduler.get_job(f"process_screenshot_{screenshot_id}") is None:
+            enqueue_processing(screenshot_id)
+
+
+def start():
+    scheduler.add_job(
+        process_pending_screenshots,
+        "interval",
+        minutes=10,
+        next_run_time=timezone.now(),
+        id="process_pending_screenshots",
+        replace_existing=True,
+    )
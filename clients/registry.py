@@ -0,0 +1,60 @@
+import threading
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+
+from clients.models import Client
+from clients.stamp import client_version
+
+ClientInfo = namedtuple("ClientInfo", ["id", "name", "filename", "version"])
+
+
+class ClientRegistry:
+    """
+    Process-local map of every client id to its name, filename and version,
+    so hot paths such as stat writes never query the default database.
+    It reloads when ``client_version`` shows a change made in any process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients = None
+        self._version = None
+
+    def _stale(self):
+        return self._clients is None or self._version != client_version.current()
+
+    def _load(self):
+        with self._lock:
+            if self._stale():
+                self._version = client_version.current()
+                self._clients = {
+                    client[0]: ClientInfo(*client)
+                    for client in Client.objects.values_list(
+                        "id", "name", "filename", "version"
+                    )
+                }
+            return self._clients
+
+    def clients(self):
+        """Get ``{client_id: ClientInfo}`` for every client"""
+        return self._load() if self._stale() else self._clients
+
+    async def aclients(self):
+        """``clients()`` for async code; only hops to a thread to reload"""
+        return await sync_to_async(self._load)() if self._stale() else self._clients
+
+    def get(self, client_id):
+        return self.clients().get(client_id)
+
+    async def aget(self, client_id):
+        return (await self.aclients()).get(client_id)
+
+    def __contains__(self, client_id):
+        return client_id in self.clients()
+
+    async def acontains(self, client_id):
+        return client_id in await self.aclients()
+
+
+client_registry = ClientRegistry()
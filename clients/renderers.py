@@ -0,0 +1,60 @@
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+_encoder = JSONEncoder()
+
+
+def dumps(data):
+    """
+    Serialize ``data`` to compact UTF-8 JSON bytes with orjson when it is
+    installed, falling back to the stdlib encoder DRF uses. Types orjson
+    doesn't know (``Decimal``, lazy translations, ...) go through DRF's
+    ``JSONEncoder.default`` either way.
+    """
+    if orjson is None:
+        return JSONRenderer().render(data)
+    ret = orjson.dumps(data, default=_encoder.default)
+    # Same as JSONRenderer: keep the output valid inside JavaScript
+    if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+        ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+    return ret
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    ``JSONRenderer`` that encodes with orjson when available. Indented
+    output, as requested by the browsable API, still uses the stdlib.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if orjson is None or self.get_indent(
+            accepted_media_type, renderer_context or {}
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class JsonResponse(HttpResponse):
+    """
+    Drop-in for ``django.http.JsonResponse`` for the function views,
+    encoded with the same fast path as the DRF views.
+    """
+
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError(
+                "In order to allow non-dict objects to be serialized set the "
+                "safe parameter to False."
+            )
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content=dumps(data), **kwargs)
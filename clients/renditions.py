@@ -0,0 +1,86 @@
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+from PIL import features
+
+from clients.models import ClientScreenshot, ScreenshotRendition
+from clients.stamp import content_version
+
+
+def rendition_formats():
+    """``{format: quality}`` for the configured formats Pillow can encode here"""
+    return {
+        image_format: quality
+        for image_format, quality in settings.SCREENSHOT_RENDITION_FORMATS.items()
+        if features.check(image_format)
+    }
+
+
+def read_source(screenshot):
+    """Raw bytes of the best copy of a screenshot: the original upload if kept"""
+    field = screenshot.original or screenshot.image
+    with field.open("rb") as f:
+        return f.read()
+
+
+def store_results(screenshot, optimized, renditions):
+    """
+    Save the output of ``imaging.process`` for ``screenshot``: the optimized
+    image replaces the raw placeholder and the renditions replace any
+    previous ones. Marks the screenshot ready. Files that are no longer
+    referenced are left for ``manage.py gc_media``.
+    """
+    rows = []
+    for size, image_format, width, height, data in renditions:
+        rendition = ScreenshotRendition(
+            screenshot=screenshot,
+            size=size,
+            format=image_format,
+            width=width,
+            height=height,
+            file_size=len(data),
+        )
+        rendition.file.save(
+            f"{screenshot.pk}_{size}.{image_format}", ContentFile(data), save=False
+        )
+        rows.append(rendition)
+
+    screenshot.image.save(
+        f"{screenshot.client.name}_screenshot_{screenshot.pk}.webp",
+        ContentFile(optimized),
+        save=False,
+    )
+
+    with transaction.atomic():
+        screenshot.renditions.all().delete()
+        ScreenshotRendition.objects.bulk_create(rows)
+        ClientScreenshot.objects.filter(pk=screenshot.pk).update(
+            image=screenshot.image.name,
+            processing_status=ClientScreenshot.PROCESSING_READY,
+            processing_error="",
+            processed_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        # .update() sends no signals; drop the cached screenshot responses
+        transaction.on_commit(content_version.bump)
+    return rows
+
+
+def serialize_renditions(screenshot, request=None):
+    """Describe the renditions of a screenshot for API responses"""
+    renditions = []
+    for rendition in screenshot.renditions.all():
+        url = rendition.file.url
+        renditions.append(
+            {
+                "size": rendition.size,
+                "format": rendition.format,
+                "type": f"image/{rendition.format}",
+                "url": request.build_absolute_uri(url) if request else url,
+                "width": rendition.width,
+                "height": rendition.height,
+                "bytes": rendition.file_size,
+            }
+        )
+    return renditions
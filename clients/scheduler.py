@@ -0,0 +1,34 @@
+import os
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+scheduler = BackgroundScheduler()
+_started_in = None
+
+
+def is_running():
+    """
+    Whether the scheduler runs in this process. A forked worker inherits the
+    scheduler's running state but not its thread, so the pid is checked too.
+    """
+    return scheduler.running and _started_in == os.getpid()
+
+
+def start():
+    """Register the periodic jobs and start the shared background scheduler"""
+    global _started_in
+
+    from client_statistics import history
+    from CollapseAPI import sqlite
+
+    from . import cdn, heartbeat, processing, sync
+
+    heartbeat.start()
+    cdn.start()
+    processing.start()
+    sync.start()
+    history.start()
+    sqlite.start()
+    if not scheduler.running:
+        scheduler.start()
+        _started_in = os.getpid()
@@ -1,7 +1,23 @@
 from django.db import connections
-from rest_framework import routers, serializers, viewsets
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.decorators import method_decorator
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, routers, serializers, viewsets
+from rest_framework.response import Response
 
-from clients.models import Client, News, ChangelogEntry
+from clients.caching import (
+    cached_view,
+    changes,
+    combine,
+    conditional,
+    patch_http_cache,
+)
+from clients.catalog import catalog, client_list, render_client_list
+from clients.models import Client, News, ChangelogEntry, Tombstone
+from clients.pagination import KeysetPagination
+from clients.renditions import serialize_renditions
+from clients.sync import change_feed, parse_cursor
 
 
 class ClientSerializer(serializers.HyperlinkedModelSerializer):
@@ -28,6 +44,8 @@ class ClientSerializer(serializers.HyperlinkedModelSerializer):
 
     def get_launches(self, obj):
         """Get launch count from statistics database"""
+        if "launches" in self.context:
+            return self.context["launches"].get(obj.id, 0)
         try:
             cursor = connections["statistics"].cursor()
             cursor.execute(
@@ -40,6 +58,8 @@ class ClientSerializer(serializers.HyperlinkedModelSerializer):
 
     def get_downloads(self, obj):
         """Get download count from statistics database"""
+        if "downloads" in self.context:
+            return self.context["downloads"].get(obj.id, 0)
         try:
             cursor = connections["statistics"].cursor()
             cursor.execute(
@@ -57,7 +77,18 @@ class ClientSerializer(serializers.HyperlinkedModelSerializer):
         return representation
 
 
-class ChangelogEntrySerializer(serializers.ModelSerializer):
+class SummaryMixin:
+    """Leave out the (HTML) ``content`` field for ``?summary=1`` requests"""
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+        if request is not None and request.GET.get("summary") in ("1", "true"):
+            fields.pop("content", None)
+        return fields
+
+
+class ChangelogEntrySerializer(SummaryMixin, serializers.ModelSerializer):
     class Meta:
         model = ChangelogEntry
         fields = ["version", "content", "created_at"]
@@ -66,12 +97,14 @@ class ChangelogEntrySerializer(serializers.ModelSerializer):
 class ClientDetailedSerializer(serializers.HyperlinkedModelSerializer):
     changelog_entries = ChangelogEntrySerializer(many=True, read_only=True)
     screenshot_urls = serializers.SerializerMethodField()
+    screenshots = serializers.SerializerMethodField()
 
     class Meta:
         model = Client
         fields = [
             "source_link",
             "screenshot_urls",
+            "screenshots",
             "changelog_entries",
             "created_at",
         ]
@@ -86,21 +119,109 @@ class ClientDetailedSerializer(serializers.HyperlinkedModelSerializer):
                 screenshots.append(screenshot.image.url)
         return screenshots
 
+    def get_screenshots(self, obj):
+        """Every screenshot with its renditions, in the order of ``screenshot_urls``"""
+        request = self.context.get("request")
+        return [
+            {
+                "id": screenshot.id,
+                "url": (
+                    request.build_absolute_uri(screenshot.image.url)
+                    if request
+                    else screenshot.image.url
+                ),
+                "order": screenshot.order,
+                "status": screenshot.processing_status,
+                "renditions": serialize_renditions(screenshot, request),
+            }
+            for screenshot in obj.screenshots.all()
+        ]
+
+
+class ClientBootstrapSerializer(ClientSerializer):
+    """A client with everything ``/api/client/<id>/detailed`` adds to it"""
+
+    changelog_entries = ChangelogEntrySerializer(many=True, read_only=True)
+    screenshots = serializers.SerializerMethodField()
+
+    class Meta(ClientSerializer.Meta):
+        fields = ClientSerializer.Meta.fields + [
+            "source_link",
+            "changelog_entries",
+            "screenshots",
+        ]
+
+    get_screenshots = ClientDetailedSerializer.get_screenshots
+
 
 class ClientViewSet(viewsets.ModelViewSet):
     queryset = Client.objects.all()
     serializer_class = ClientSerializer
 
+    def list(self, request, *args, **kwargs):
+        """
+        List clients.
+        JSON requests are answered from the pre-rendered catalog snapshot,
+        with ``If-None-Match`` support; other formats are serialized per request.
+        With ``?since=<cursor>`` only the changes since that cursor are returned.
+        """
+        if "since" in request.query_params:
+            try:
+                since = parse_cursor(request.query_params["since"])
+            except ValueError as e:
+                return Response({"error": str(e)}, status=400)
+            feed = change_feed(
+                self.filter_queryset(self.get_queryset()),
+                Tombstone.CLIENT,
+                since,
+                render_client_list,
+            )
+            return patch_http_cache(Response(feed), "clients")
+
+        if request.accepted_renderer.format != "json":
+            return Response(client_list(self.filter_queryset(self.get_queryset())))
+
+        body, etag = catalog.get()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(body, content_type="application/json")
+        response["ETag"] = etag
+        return patch_http_cache(response, "clients")
+
 
-class NewsSerializer(serializers.HyperlinkedModelSerializer):
+class NewsSerializer(SummaryMixin, serializers.HyperlinkedModelSerializer):
     class Meta:
         model = News
         fields = ["id", "title", "content", "language", "created_at", "updated_at"]
 
 
+def news_list_changes(request):
+    queryset = News.objects.all()
+    language = request.query_params.get("language", None)
+    if language is not None:
+        queryset = queryset.filter(language=language)
+    return combine(
+        changes(queryset, count=False),
+        changes(
+            Tombstone.objects.filter(kind=Tombstone.NEWS),
+            field="deleted_at",
+            count=False,
+        ),
+    )
+
+
+def news_changes(request, pk):
+    return changes(News.objects.filter(pk=pk))
+
+
+@method_decorator(conditional("news", news_list_changes), name="list")
+@method_decorator(conditional("news", news_changes), name="retrieve")
+@method_decorator(cached_view("news"), name="list")
+@method_decorator(cached_view("news"), name="retrieve")
 class NewsViewSet(viewsets.ModelViewSet):
     queryset = News.objects.all()
     serializer_class = NewsSerializer
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         queryset = News.objects.all()
@@ -109,6 +230,42 @@ class NewsViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(language=language)
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        """List news, or with ``?since=<cursor>`` only the changes since that cursor"""
+        if "since" not in request.query_params:
+            return super().list(request, *args, **kwargs)
+        try:
+            since = parse_cursor(request.query_params["since"])
+        except ValueError as e:
+            return Response({"error": str(e)}, status=400)
+        feed = change_feed(
+            self.filter_queryset(self.get_queryset()),
+            Tombstone.NEWS,
+            since,
+            lambda news: self.get_serializer(news, many=True).data,
+        )
+        return Response(feed)
+
+
+def changelog_changes(request, client_id):
+    return changes(ChangelogEntry.objects.filter(client_id=client_id))
+
+
+@method_decorator(conditional("changelog", changelog_changes), name="get")
+@method_decorator(cached_view("changelog"), name="get")
+class ChangelogEntryList(generics.ListAPIView):
+    """
+    Changelog of a client, newest first.
+    Supports ``?limit=``/``?cursor=`` pagination and ``?summary=1``.
+    """
+
+    serializer_class = ChangelogEntrySerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        client = get_object_or_404(Client, id=self.kwargs["client_id"])
+        return client.changelog_entries.all()
+
 
 router = routers.DefaultRouter()
 router.register(r"clients", ClientViewSet)
@@ -0,0 +1,50 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from clients.catalog import catalog
+from clients.models import ChangelogEntry, Client, ClientScreenshot, News, Tombstone
+from clients.stamp import client_version, content_version
+
+
+def refresh_clients():
+    client_version.bump()
+    content_version.bump()
+    catalog.rebuild()
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+def client_changed(sender, **kwargs):
+    """
+    Once the change is committed, tell every worker's registry and catalog
+    snapshot that clients changed and re-render this process's snapshot.
+    """
+    transaction.on_commit(refresh_clients)
+
+
+@receiver(post_save, sender=News)
+@receiver(post_delete, sender=News)
+@receiver(post_save, sender=ChangelogEntry)
+@receiver(post_delete, sender=ChangelogEntry)
+@receiver(post_save, sender=ClientScreenshot)
+@receiver(post_delete, sender=ClientScreenshot)
+def content_changed(sender, **kwargs):
+    """Invalidate every worker's cached views once the change is committed"""
+    transaction.on_commit(content_version.bump)
+
+
+@receiver(post_delete, sender=Client)
+@receiver(post_delete, sender=News)
+def record_tombstone(sender, instance, **kwargs):
+    """Keep deleted ids for the ``?since=`` change feeds"""
+    kind = Tombstone.CLIENT if sender is Client else Tombstone.NEWS
+    Tombstone.objects.create(kind=kind, object_id=instance.pk)
+
+
+@receiver(post_delete, sender=ChangelogEntry)
+@receiver(post_delete, sender=ClientScreenshot)
+def client_child_deleted(sender, instance, **kwargs):
+    """A removed changelog entry or screenshot is a change of its client"""
+    Client.objects.filter(pk=instance.client_id).update(updated_at=timezone.now())
@@ -0,0 +1,45 @@
+import os
+import time
+from pathlib import Path
+
+from django.conf import settings
+
+
+class VersionStamp:
+    """
+    Cheap change marker shared by every worker process: the mtime of the file
+    named by the ``setting``. ``bump()`` touches the file, ``current()`` stats
+    it at most once per ``CLIENT_VERSION_CHECK_INTERVAL`` seconds.
+    """
+
+    def __init__(self, setting="CLIENT_VERSION_STAMP"):
+        self._setting = setting
+        self._version = None
+        self._checked_at = 0.0
+
+    @property
+    def path(self):
+        return getattr(settings, self._setting)
+
+    def current(self):
+        now = time.monotonic()
+        if (
+            self._version is None
+            or now - self._checked_at >= settings.CLIENT_VERSION_CHECK_INTERVAL
+        ):
+            try:
+                self._version = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                self._version = 0
+            self._checked_at = now
+        return self._version
+
+    def bump(self):
+        Path(self.path).touch()
+        self._version = None
+
+
+# Bumped whenever a Client changes; caches of client data compare against it.
+client_version = VersionStamp()
+# Bumped whenever anything served by the cached views changes.
+content_version = VersionStamp("CONTENT_VERSION_STAMP")
@@ -0,0 +1,46 @@
+import hashlib
+import os
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Media storage that names files after the SHA-256 of their content, e.g.
+    ``blobs/3f/3fa2...e1.webp``. Saving the same bytes twice stores them once,
+    and a name always refers to the same content, so its URL can be cached
+    forever. Only the extension of the requested name is kept.
+
+    Blobs may be shared by several rows, so they are never deleted when a
+    row lets go of one; ``manage.py gc_media`` removes unreferenced blobs.
+    """
+
+    prefix = "blobs"
+
+    def save(self, name, content, max_length=None):
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+
+        digest = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+        name = f"{self.prefix}/{digest[:2]}/{digest}{extension}"
+        if self.exists(name):
+            try:
+                # Restart gc_media's grace period: a row is about to reference
+                # this blob again, possibly after it had become unreferenced.
+                os.utime(self.path(name))
+                return name
+            except FileNotFoundError:
+                pass  # Collected in the meantime; store it again
+        return super().save(name, content, max_length=max_length)
+
+
+content_addressed_storage = ContentAddressedStorage()
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django_apscheduler.util import close_old_connections
+
+from clients.models import Tombstone
+
+
+def parse_cursor(value):
+    """
+    Parse a change cursor, as returned by ``make_cursor`` (unix seconds) or
+    given as ISO 8601. Returns ``None`` if there is none.
+    """
+    if not value:
+        return None
+    try:
+        return datetime.fromtimestamp(float(value), tz=dt_timezone.utc)
+    except (ValueError, OverflowError):
+        pass
+    since = parse_datetime(value)
+    if since is None:
+        raise ValueError(f"Invalid since: {value}")
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since, dt_timezone.utc)
+    return since
+
+
+def make_cursor(moment):
+    """
+    Cursor for changes after ``moment``. It lags by ``SYNC_CURSOR_LAG``
+    seconds so rows whose ``updated_at`` was set just before a slow commit
+    are not skipped; the next feed may repeat a few rows instead.
+    """
+    return f"{(moment - timedelta(seconds=settings.SYNC_CURSOR_LAG)).timestamp():.6f}"
+
+
+def expired(since):
+    """Whether tombstones from ``since`` may already have been removed"""
+    return since < timezone.now() - timedelta(
+        days=settings.SYNC_TOMBSTONE_RETENTION_DAYS
+    )
+
+
+def deleted_since(kind, since):
+    return list(
+        Tombstone.objects.filter(kind=kind, deleted_at__gt=since)
+        .values_list("object_id", flat=True)
+        .distinct()
+    )
+
+
+def change_feed(queryset, kind, since, serialize):
+    """
+    Rows of ``queryset`` created or modified after ``since`` plus the ids of
+    ``kind`` rows deleted since then, with the cursor to pass next time.
+    Without a usable cursor every row is returned with ``reset`` set, and the
+    caller should replace what it has.
+    """
+    now = timezone.now()
+    reset = since is None or expired(since)
+    if reset:
+        changed, deleted = queryset, []
+    else:
+        changed = queryset.filter(updated_at__gt=since)
+        deleted = deleted_since(kind, since)
+    return {
+        "cursor": make_cursor(now),
+        "reset": reset,
+        "changed": serialize(list(changed)),
+        "deleted": deleted,
+    }
+
+
+@close_old_connections
+def expire_tombstones():
+    Tombstone.objects.filter(
+        deleted_at__lt=timezone.now()
+        - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    ).delete()
+
+
+def start():
+    from clients.scheduler import scheduler
+
+    scheduler.add_job(
+        expire_tombstones,
+        "interval",
+        days=1,
+        id="expire_tombstones",
+        replace_existing=True,
+    )
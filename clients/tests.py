@@ -0,0 +1,250 @@
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from client_statistics.models import ClientDownloadStats, ClientLaunchStats
+from clients.catalog import client_list, render_client_list
+from clients.cdn import FileMetadata, resolve_client_metadata
+from clients.models import Client, ClientScreenshot
+from clients.renderers import dumps
+from clients.renditions import store_results
+from clients.stamp import client_version
+from clients.sync import make_cursor
+
+
+class APITestCase(TestCase):
+    databases = {"default", "statistics"}
+
+    @classmethod
+    def setUpClass(cls):
+        # Keep version stamps out of the working tree and re-check them on every read
+        cls._stamps = tempfile.TemporaryDirectory()
+        cls._settings = override_settings(
+            CLIENT_VERSION_STAMP=f"{cls._stamps.name}/clients",
+            CONTENT_VERSION_STAMP=f"{cls._stamps.name}/content",
+            CLIENT_VERSION_CHECK_INTERVAL=0,
+            STATS_FLUSH_INTERVAL_MS=0,
+        )
+        cls._settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls._settings.disable()
+        cls._stamps.cleanup()
+
+    def create_clients(self, count):
+        start = Client.objects.count()
+        clients = [
+            Client.objects.create(name=f"Client {i}") for i in range(start, count)
+        ]
+        client_version.bump()
+        return clients
+
+    def count_queries(self, request):
+        """Run ``request()`` and return ``(response, {alias: queries})``"""
+        with CaptureQueriesContext(
+            connections["default"]
+        ) as default, CaptureQueriesContext(connections["statistics"]) as statistics:
+            response = request()
+        return response, {"default": len(default), "statistics": len(statistics)}
+
+
+class ClientListQueryTests(APITestCase):
+    def test_list_queries_do_not_grow_with_clients(self):
+        counts = []
+        for total in (3, 30):
+            self.create_clients(total)
+            response, queries = self.count_queries(lambda: self.client.get("/clients/"))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()), total)
+            counts.append(queries)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_change_feed_queries_do_not_grow_with_clients(self):
+        counts = []
+        for total in (3, 30):
+            self.create_clients(total)
+            response, queries = self.count_queries(
+                lambda: self.client.get("/clients/?since=")
+            )
+            self.assertEqual(len(response.json()["changed"]), total)
+            counts.append(queries)
+        self.assertEqual(counts[0], counts[1])
+
+
+class CounterQueryTests(APITestCase):
+    def setUp(self):
+        self.target = self.create_clients(1)[0]
+
+    def assertPostQueries(self, url, queries):
+        # The first request loads the client registry and the running totals
+        self.client.post(url)
+        response, counted = self.count_queries(lambda: self.client.post(url))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(counted, queries)
+
+    def test_launch_queries(self):
+        self.assertPostQueries(
+            f"/api/client/{self.target.id}/launch", {"default": 0, "statistics": 5}
+        )
+
+    def test_download_queries(self):
+        self.assertPostQueries(
+            f"/api/client/{self.target.id}/download", {"default": 0, "statistics": 5}
+        )
+
+    def test_loader_launch_queries(self):
+        self.assertPostQueries("/api/loader/launch", {"default": 0, "statistics": 5})
+
+
+class CDNEtagTests(APITestCase):
+    def setUp(self):
+        self.target = Client.objects.create(
+            name="Target", md5_hash="a" * 32, size=1, cdn_etag='"v1"'
+        )
+
+    def test_save_keeps_etag_when_file_fields_are_unchanged(self):
+        self.target.version = "1.12.2"
+        self.target.save()
+        self.target.refresh_from_db()
+        self.assertEqual(self.target.cdn_etag, '"v1"')
+
+    def test_save_clears_etag_when_file_fields_change(self):
+        for field, value in [
+            ("md5_hash", "b" * 32),
+            ("size", 2),
+            ("filename", "x.jar"),
+        ]:
+            Client.objects.filter(pk=self.target.pk).update(cdn_etag='"v1"')
+            self.target.refresh_from_db()
+            setattr(self.target, field, value)
+            self.target.save()
+            self.target.refresh_from_db()
+            self.assertEqual(self.target.cdn_etag, "", field)
+
+    def resolve(self, metadata):
+        Client.objects.filter(pk=self.target.pk).update(cdn_etag="")
+        with mock.patch("clients.cdn.fetch_metadata", return_value=metadata):
+            # Skip the job's close_old_connections, which would close the
+            # connections held open by the test transaction
+            resolve_client_metadata.__wrapped__(self.target.pk)
+        self.target.refresh_from_db()
+        return self.target.cdn_etag
+
+    def test_resolve_stores_etag_only_for_matching_file(self):
+        size = 1024 * 1024
+        self.assertEqual(
+            self.resolve(FileMetadata("a" * 32, "0" * 64, size, '"v2"')), '"v2"'
+        )
+        with self.assertLogs("clients.cdn", "WARNING"):
+            self.assertEqual(
+                self.resolve(FileMetadata("c" * 32, "0" * 64, size, '"v3"')), ""
+            )
+        # The hand-entered hash is kept either way
+        self.assertEqual(self.target.md5_hash, "a" * 32)
+
+
+@override_settings(SYNC_TOMBSTONE_RETENTION_DAYS=30)
+class BootstrapSinceTests(APITestCase):
+    def bootstrap(self, since):
+        return self.client.get(
+            "/api/bootstrap", {"fields": "clients", "since": make_cursor(since)}
+        ).json()
+
+    def test_recent_cursor_returns_changes(self):
+        old, new = self.create_clients(2)
+        Client.objects.filter(pk=old.pk).update(
+            updated_at=timezone.now() - timedelta(days=1)
+        )
+        data = self.bootstrap(timezone.now() - timedelta(hours=1))
+        self.assertFalse(data["reset"])
+        self.assertEqual([c["id"] for c in data["clients"]], [new.pk])
+        self.assertEqual(data["deleted"], {"clients": []})
+
+    def test_expired_cursor_returns_full_snapshot(self):
+        clients = self.create_clients(2)
+        Client.objects.update(updated_at=timezone.now() - timedelta(days=60))
+        data = self.bootstrap(timezone.now() - timedelta(days=31))
+        self.assertTrue(data["reset"])
+        self.assertEqual(
+            sorted(c["id"] for c in data["clients"]), [c.pk for c in clients]
+        )
+        self.assertNotIn("deleted", data)
+
+
+class ScreenshotCacheTests(APITestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media_root = override_settings(MEDIA_ROOT=self.media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+        self.target = self.create_clients(1)[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.screenshot = ClientScreenshot.objects.create(
+                client=self.target,
+                image="client_screenshots/raw.png",
+                processing_status=ClientScreenshot.PROCESSING_PENDING,
+            )
+        self.url = f"/api/client/{self.target.pk}/screenshots"
+
+    def get(self, **extra):
+        response = self.client.get(self.url, **extra)
+        return response["X-Cache"], response.json()
+
+    def test_processed_screenshot_is_not_served_from_cache(self):
+        self.assertEqual(self.get()[0], "MISS")
+        cache, data = self.get()
+        self.assertEqual(cache, "HIT")
+        self.assertEqual(data["screenshots"][0]["status"], "pending")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            store_results(self.screenshot, b"webp", [])
+
+        cache, data = self.get()
+        self.assertEqual(cache, "MISS")
+        self.assertEqual(data["screenshots"][0]["status"], "ready")
+
+    def test_cache_is_keyed_by_host(self):
+        self.get(HTTP_HOST="api.example.com")
+        cache, data = self.get(HTTP_HOST="evil.example.com")
+        self.assertEqual(cache, "MISS")
+        self.assertTrue(
+            data["screenshots"][0]["url"].startswith("http://evil.example.com/")
+        )
+        self.assertEqual(self.get(HTTP_HOST="api.example.com")[0], "HIT")
+
+
+class ClientListContractTests(APITestCase):
+    def setUp(self):
+        for i in range(12):
+            client = Client.objects.create(
+                name=f"Client {i}",
+                filename=f"Client{i}.jar",
+                size=42,
+                insecure=i % 3 == 0,
+                show=i % 5 != 0,
+            )
+            # Leave some clients without one or both counters
+            if i % 4:
+                ClientLaunchStats.objects.create(client_id=client.id, launches=i)
+            if i % 2:
+                ClientDownloadStats.objects.create(client_id=client.id, downloads=i * 2)
+
+    def test_client_list_matches_serializer(self):
+        self.assertEqual(
+            dumps(client_list()), dumps(render_client_list(list(Client.objects.all())))
+        )
+
+    def test_filtered_client_list_matches_serializer(self):
+        queryset = Client.objects.filter(show=True)
+        self.assertEqual(
+            dumps(client_list(queryset)), dumps(render_client_list(list(queryset)))
+        )
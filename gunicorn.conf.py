@@ -0,0 +1,85 @@
+import multiprocessing
+import os
+import subprocess
+import sys
+
+# Production server settings, used by `python manage.py serve`.
+#   GUNICORN_WORKER_CLASS=sync      WSGI through CollapseAPI/wsgi.py (default)
+#   GUNICORN_WORKER_CLASS=uvicorn   ASGI through CollapseAPI/asgi.py
+# Send SIGHUP to the master to gracefully replace the workers.
+# Background jobs run in a separate `manage.py run_scheduler` process started
+# by the master, so no scheduler threads exist in the process that forks.
+
+ASGI = os.getenv("GUNICORN_WORKER_CLASS", "sync") == "uvicorn"
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+wsgi_app = "CollapseAPI.asgi:application" if ASGI else "CollapseAPI.wsgi:application"
+worker_class = "uvicorn_worker.UvicornWorker" if ASGI else "sync"
+
+# Sync workers block on I/O, so run two per core; async workers need one.
+workers = int(
+    os.getenv(
+        "GUNICORN_WORKERS",
+        multiprocessing.cpu_count() if ASGI else multiprocessing.cpu_count() * 2 + 1,
+    )
+)
+
+# Import Django once in the master so workers share its memory copy-on-write.
+preload_app = True
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "5000"))
+max_requests_jitter = max_requests // 10
+
+accesslog = "-"
+errorlog = "-"
+
+
+def start_scheduler(server):
+    # Kept on the arbiter: SIGHUP re-executes this file, resetting its globals.
+    server.scheduler_process = subprocess.Popen(
+        [sys.executable, "manage.py", "run_scheduler"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    server.log.info("Started scheduler process %s", server.scheduler_process.pid)
+
+
+def stop_scheduler(server):
+    process = getattr(server, "scheduler_process", None)
+    if process is None or process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(graceful_timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def when_ready(server):
+    from django.db import connections
+
+    from clients.registry import client_registry
+
+    # Load the client registry before forking so workers start with it.
+    client_registry.clients()
+    connections.close_all()
+
+    start_scheduler(server)
+
+
+def on_reload(server):
+    stop_scheduler(server)
+    start_scheduler(server)
+
+
+def worker_exit(server, worker):
+    from clients import processing
+
+    # Don't leave the worker's screenshot process pool behind.
+    processing.shutdown()
+
+
+def on_exit(server):
+    stop_scheduler(server)
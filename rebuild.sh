@@ -1,4 +1,4 @@
-docker stop collapseapi
+docker stop --time 35 collapseapi
 docker rm collapseapi
 git pull
 docker build -t collapse/api .